@@ -3,6 +3,65 @@ import json
 import re
 import time
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+## Pattern updates are sent in batches whose size adapts to what the server accepts:
+## it grows by BATCH_SIZE_INCREASE after every accepted request and is halved on 413 or a 5xx that persists after retries.
+## The size learned on one tool is kept on the limiter and used by the next tool
+INITIAL_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+BATCH_SIZE_INCREASE = 100
+
+## Repositories are linked to the coding standard LINK_CHUNK_SIZE at a time; rejected chunks are retried in halves
+LINK_CHUNK_SIZE = 100
+
+## Tools are set up concurrently, and the requests of all threads go through one limiter that spaces them:
+## the delay between requests shrinks by LIMITER_DECREASE after every accepted request and doubles on 429 or 5xx.
+## Requests answered with 429 or 5xx are sent again up to MAX_RETRIES times, waiting RETRY_BACKOFF * 2^attempt seconds
+MAX_WORKERS = 8
+MAX_RETRIES = 5
+LIMITER_INITIAL_INTERVAL = 0.1
+LIMITER_MIN_INTERVAL = 0.02
+LIMITER_MAX_INTERVAL = 5.0
+LIMITER_DECREASE = 0.01
+RETRY_BACKOFF = 0.5
+
+class AdaptiveLimiter:
+    def __init__(self):
+        self.interval = LIMITER_INITIAL_INTERVAL
+        self.nextSlot = time.monotonic()
+        self.lock = threading.Lock()
+        self.batchSize = INITIAL_BATCH_SIZE
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            waitTime = self.nextSlot - now
+            self.nextSlot = max(now, self.nextSlot) + self.interval
+        if waitTime > 0:
+            time.sleep(waitTime)
+
+    def onResponse(self, status):
+        with self.lock:
+            if status == 429 or status >= 500:
+                self.interval = min(LIMITER_MAX_INTERVAL, max(self.interval * 2, LIMITER_MIN_INTERVAL))
+            else:
+                self.interval = max(LIMITER_MIN_INTERVAL, self.interval - LIMITER_DECREASE)
+
+limiter = AdaptiveLimiter()
+
+def limitedRequest(method, url, **kwargs):
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.wait()
+        response = requests.request(method, url, **kwargs)
+        limiter.onResponse(response.status_code)
+        # on 429 or 5xx the limiter has already slowed down, back off and send the same request again
+        if response.status_code != 429 and response.status_code < 500:
+            break
+        if attempt < MAX_RETRIES:
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+    return response
 
 def createDraft(baseurl,provider, organization,token,languages):
     codingID = getCodingStandardId(baseurl,provider,organization,token,False)
@@ -15,7 +74,7 @@ def createDraft(baseurl,provider, organization,token,languages):
     }
     url = f'{baseurl}/api/v3/organizations/{provider}/{organization}/coding-standards?sourceCodingStandard={codingID}'
     data = '{"name":"defaultCodingStandard","languages": %s}' % (languages)
-    createDraft = requests.post(url, headers=headers,data=data)
+    createDraft = limitedRequest('POST', url, headers=headers,data=data)
     return createDraft.status_code
 
 def createCodingStandard(baseurl,provider, organization,token,languages,repo):
@@ -28,7 +87,7 @@ def createCodingStandard(baseurl,provider, organization,token,languages,repo):
     }
     url = f'{baseurl}/api/v3/organizations/{provider}/{organization}/coding-standards?sourceRepository={repo}'
     data = '{"name":"defaultCodingStandard","languages": %s}' % (languages)
-    createDraft = requests.post(url, headers=headers,data=data)
+    createDraft = limitedRequest('POST', url, headers=headers,data=data)
     return createDraft.status_code
 
 def listLanguagesAllRepos(repositories):
@@ -46,8 +105,16 @@ def listRepositories(baseurl,provider,organization,token):
         'Content-Type': 'application/json',
         'api-token': token
     }
-    url = '%s/api/v3/organizations/%s/%s/repositories' % (baseurl,provider,organization)
-    repositories = json.loads(requests.get(url, headers=headers).text)['data']
+    repositories = []
+    cursor = ''
+    hasNextPage = True
+    while hasNextPage:
+        url = '%s/api/v3/organizations/%s/%s/repositories?limit=100&%s' % (baseurl,provider,organization,cursor)
+        page = json.loads(limitedRequest('GET', url, headers=headers).text)
+        repositories += page['data']
+        hasNextPage = 'cursor' in page.get('pagination', {})
+        if hasNextPage:
+            cursor = 'cursor=%s' % page['pagination']['cursor']
     return repositories
 
 def getCodingStandardId(baseurl,provider,organization,token,existingDraft):
@@ -59,7 +126,7 @@ def getCodingStandardId(baseurl,provider,organization,token,existingDraft):
         'api-token': token
     }
     url = '%s/api/v3/organizations/%s/%s/coding-standards' % (baseurl,provider,organization)
-    data = json.loads(requests.get(url, headers=headers).text)['data']
+    data = json.loads(limitedRequest('GET', url, headers=headers).text)['data']
     for id in data:
         if(id['isDraft'] == existingDraft):
            return id['id']
@@ -73,16 +140,10 @@ def listTools(baseurl,provider,organization,token,codingID):
         'api-token': token
     }
     url = f'{baseurl}/api/v3/organizations/{provider}/{organization}/coding-standards/{codingID}/tools'
-    listTools = requests.get(url, headers=headers).text
+    listTools = limitedRequest('GET', url, headers=headers).text
     data = json.loads(listTools)['data']
     return data
 
-def enableTools(data,baseurl,provider,organization,token,codingID): #enable all tools according to the languages in CS languages
-    enabled = "true"
-    for tools in data:
-        print("Enabling the tool ID:", tools['uuid'])
-        enableDisableTool(baseurl,provider,organization,token,tools['uuid'],enabled,codingID)
-
 def listPatterns(baseurl,toolID, provider, organization, codingID,token):
     result = []
     cursor = ''
@@ -97,7 +158,7 @@ def listPatterns(baseurl,toolID, provider, organization, codingID,token):
     while hasNextPage:
         url = '%s/api/v3/organizations/%s/%s/coding-standards/%s/tools/%s/patterns?limit=100&%s' % (    
             baseurl, provider, organization, codingID,toolID, cursor)
-        r = requests.get(url, headers=headers)
+        r = limitedRequest('GET', url, headers=headers)
         patterns = json.loads(r.text)
         for pattern in patterns['data']:
             result.append(
@@ -114,35 +175,48 @@ def listPatterns(baseurl,toolID, provider, organization, codingID,token):
             cursor = 'cursor=%s' % patterns['pagination']['cursor']
     return result
 
-def enableSecurityPatterns(patterns,baseurl,provider,organization,token,toolUuid,codingID):
-    patternsPayload = []
-    for pattern in patterns:
-        if(pattern['category'] == 'Security') and (pattern['severityLevel'] == 'Warning' or pattern['severityLevel'] == 'Error'):
-            patternsPayload.append({
-                "id": pattern['id'],
-                "enabled": True
-            })
-    for i in range(0, len(patternsPayload), 500):
-        enableDisableRule(baseurl,provider,organization,token,toolUuid,patternsPayload[i:i+500],codingID)
+def isSecurityPattern(pattern):
+    return (pattern['category'] == 'Security') and (pattern['severityLevel'] == 'Warning' or pattern['severityLevel'] == 'Error')
 
-def disableAllPatterns(patterns,baseurl,provider,organization,token,toolUuid,codingID):
+def applySecurityOnlyPatterns(patterns,baseurl,provider,organization,token,toolUuid,codingID,batchSize=INITIAL_BATCH_SIZE):
+    # every pattern is sent once with its final state: medium and critical security patterns enabled, all the others disabled
     patternsPayload = []
     for pattern in patterns:
         patternsPayload.append({
                 "id": pattern['id'],
-                "enabled": False
+                "enabled": isSecurityPattern(pattern)
                 })
-    for i in range(0, len(patternsPayload), 500):
-        enableDisableRule(baseurl,provider,organization,token,toolUuid,patternsPayload[i:i+500],codingID)
+    return updatePatternsInBatches(baseurl,provider,organization,token,toolUuid,patternsPayload,codingID,batchSize)
+
+def updatePatternsInBatches(baseurl,provider,organization,token,toolUuid,patternsPayload,codingID,batchSize=INITIAL_BATCH_SIZE):
+    i = 0
+    while i < len(patternsPayload):
+        batch = patternsPayload[i:i+batchSize]
+        status = enableDisableRule(baseurl,provider,organization,token,toolUuid,batch,codingID)
+        if status < 400:
+            if len(batch) == batchSize:
+                batchSize = min(MAX_BATCH_SIZE, batchSize + BATCH_SIZE_INCREASE)
+            i += len(batch)
+        elif (status == 413 or status >= 500) and len(batch) > 1:
+            batchSize = max(1, len(batch) // 2)
+            print("Reducing batch size to", batchSize)
+        else:
+            print("Failed to update", len(batch), "patterns")
+            i += len(batch)
+    return batchSize
 
-def enableToolsAndRules(baseurl,provider,organization,token,codingID):
+def setupTool(baseurl,provider,organization,token,codingID,tool):
+    print("\nWe're working on the tool ID: ",tool['uuid'])
+    enableDisableTool(baseurl,provider,organization,token,tool['uuid'],"true",codingID)
+    patterns = listPatterns(baseurl,tool['uuid'], provider, organization, codingID,token)
+    limiter.batchSize = applySecurityOnlyPatterns(patterns,baseurl,provider,organization,token,tool['uuid'],codingID,limiter.batchSize)
+
+def enableToolsAndRules(baseurl,provider,organization,token,codingID,maxWorkers=MAX_WORKERS):
     tools = listTools(baseurl,provider,organization,token,codingID)
-    enableTools(tools,baseurl,provider,organization,token,codingID)
-    for tool in tools:
-        print("\nWe're working on the tool ID: ",tool['uuid'])
-        patterns = listPatterns(baseurl,tool['uuid'], provider, organization, codingID,token)
-        disableAllPatterns(patterns,baseurl,provider,organization,token,tool['uuid'],codingID)
-        enableSecurityPatterns(patterns,baseurl,provider,organization,token,tool['uuid'],codingID)
+    with ThreadPoolExecutor(max_workers=max(1, maxWorkers)) as executor:
+        futures = [executor.submit(setupTool,baseurl,provider,organization,token,codingID,tool) for tool in tools]
+        for future in futures:
+            future.result()
 
 def enableDisableTool(baseurl,provider,organization,token,toolUuid,enabled,codingID):
     authority = re.sub('http[s]{0,1}://', '', baseurl)
@@ -160,9 +234,8 @@ def enableDisableTool(baseurl,provider,organization,token,toolUuid,enabled,codin
         ]
         }
         """ % (enabled)
-    updateTool = requests.patch(url, data = data, headers=headers)
+    updateTool = limitedRequest('PATCH', url, data = data, headers=headers)
     print(updateTool.status_code)
-    time.sleep(2)
 
 def enableDisableRule(baseurl,provider,organization,token,toolUuid,patternsPayload,codingID):
     authority = re.sub('http[s]{0,1}://', '', baseurl)
@@ -178,11 +251,11 @@ def enableDisableRule(baseurl,provider,organization,token,toolUuid,patternsPaylo
         "patterns": patternsPayload
     }
     data = json.dumps(data)
-    updateRule = requests.patch(url, data = data, headers=headers)
+    updateRule = limitedRequest('PATCH', url, data = data, headers=headers)
     print(updateRule.status_code)
-    time.sleep(2)
+    return updateRule.status_code
 
-def applyCodingStandardToRepositories(baseurl,provider,organization,token,codingID,repositories):
+def linkRepositories(baseurl,provider,organization,token,codingID,repositoryNames):
     authority = re.sub('http[s]{0,1}://', '', baseurl)
     headers = {
         'authority': authority,
@@ -191,18 +264,37 @@ def applyCodingStandardToRepositories(baseurl,provider,organization,token,coding
         'api-token': token
     }
     url = f'{baseurl}/api/v3/organizations/{provider}/{organization}/coding-standards/{codingID}/repositories'
-    data = """
-        {
-            "link": [
-                "%s"
-            ],
-            "unlink": [ 
-            ]
-        }
-    """ % (repositories)
-    applyCodingStandard = requests.patch(url, data = data, headers=headers)
+    data = {
+        "link": repositoryNames,
+        "unlink": []
+    }
+    data = json.dumps(data)
+    applyCodingStandard = limitedRequest('PATCH', url, data = data, headers=headers)
     print(applyCodingStandard.status_code)
-    time.sleep(2)
+    return applyCodingStandard.status_code
+
+def applyCodingStandardToRepositories(baseurl,provider,organization,token,codingID,repositories,chunkSize=LINK_CHUNK_SIZE):
+    if isinstance(repositories, str):
+        repositories = [repositories]
+    maxChunkSize = chunkSize
+    i = 0
+    while i < len(repositories):
+        chunk = repositories[i:i+chunkSize]
+        status = linkRepositories(baseurl,provider,organization,token,codingID,chunk)
+        if status < 400:
+            i += len(chunk)
+            chunkSize = min(maxChunkSize, chunkSize * 2)
+        elif (status == 400 or status == 413 or status >= 500) and len(chunk) > 1:
+            # the chunk may be too large or contain a repository that can't be linked: retry it in halves
+            # and keep using that size
+            chunkSize = max(1, len(chunk) // 2)
+            maxChunkSize = chunkSize
+            print("Reducing chunk size to", chunkSize)
+        else:
+            print("Failed to apply the coding standard to", chunk)
+            i += len(chunk)
+            # the repository that can't be linked explains the rejected chunks, not their size
+            maxChunkSize = LINK_CHUNK_SIZE
 
 def promoteDraft(baseurl,provider,organization,token,codingID):
     authority = re.sub('http[s]{0,1}://', '', baseurl)
@@ -212,7 +304,7 @@ def promoteDraft(baseurl,provider,organization,token,codingID):
         'api-token': token
     }
     url = f'{baseurl}/api/v3/organizations/{provider}/{organization}/coding-standards/{codingID}/promote'
-    promoteDraft = requests.post(url, headers=headers)
+    promoteDraft = limitedRequest('POST', url, headers=headers)
     print(promoteDraft.status_code)
 
 def setDefault(baseurl,provider,organization,token,codingID):
@@ -228,7 +320,7 @@ def setDefault(baseurl,provider,organization,token,codingID):
             "isDefault": true
         }
         """
-    setDefault = requests.post(url, headers=headers, data = data)
+    setDefault = limitedRequest('POST', url, headers=headers, data = data)
     print(setDefault.status_code)
 
 def main():
@@ -243,6 +335,8 @@ def main():
                         default=None, help='organization name')
     parser.add_argument('--baseurl', dest='baseurl', default='https://app.codacy.com',
                         help='codacy server address (ignore if you use cloud)')
+    parser.add_argument('--maxworkers', dest='maxworkers', type=int, default=MAX_WORKERS,
+                        help='number of tools set up concurrently')
     args = parser.parse_args()
    
     print("\nScript is running... take a coffee and enjoy!\n")
@@ -270,12 +364,11 @@ def main():
             codingStandardID = getCodingStandardId(args.baseurl,args.provider,args.organization,args.token,True)
     
     #3rd step: enable all medium and critical security rules and disabled all the other rules
-    enableToolsAndRules(args.baseurl,args.provider,args.organization,args.token,codingStandardID)
+    enableToolsAndRules(args.baseurl,args.provider,args.organization,args.token,codingStandardID,args.maxworkers)
     
     #4th step: apply draft to all repos
-    for repo in repositories:
-        print("Applying this CS to the repo: ",repo['name'])
-        applyCodingStandardToRepositories(args.baseurl,args.provider,args.organization,args.token,codingStandardID,repo['name'])
+    print("Applying this CS to", len(repositories), "repositories")
+    applyCodingStandardToRepositories(args.baseurl,args.provider,args.organization,args.token,codingStandardID,[repo['name'] for repo in repositories])
 
     #5th step: promote draft
     print("Promoting this CS...")
@@ -4,8 +4,35 @@ from datetime import timedelta,datetime
 import csv
 import time
 import argparse
+import os
 
-def getPRList(baseurl,provider,organization,repository,apiToken,typeOfPR):
+## Snapshot layout: {str(PR id): row}, where each row is the dict built by getPRList,
+## so a PR has a single row whose typeOfPR is the list it was last seen in
+def loadSnapshot(snapshotFile):
+    if snapshotFile is None or not os.path.exists(snapshotFile):
+        return {}
+    with open(snapshotFile) as f:
+        snapshot = json.load(f)
+    ## snapshots of older versions were keyed by typeOfPR first
+    if 'merged' in snapshot or 'last-updated' in snapshot:
+        snapshot = {prId: pullrequest for typeOfPR in ['last-updated','merged'] for prId, pullrequest in snapshot.get(typeOfPR, {}).items()}
+    return snapshot
+
+def saveSnapshot(snapshotFile,snapshot):
+    tmpFile = snapshotFile + '.tmp'
+    with open(tmpFile, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmpFile, snapshotFile)
+
+## Rows with '-' in any of these metrics were saved before the PR analysis finished, so they are refetched.
+## Coverage is left out because repositories without coverage reports never get it
+ANALYSIS_METRICS = ['newIssues','fixedIssues','deltaClonesCount','deltaComplexity']
+
+def isPendingAnalysis(pullrequest):
+    return any(pullrequest.get(metric) == '-' for metric in ANALYSIS_METRICS)
+
+## With seenPRs, the whole list is walked and the id of every listed PR is added to it
+def getPRList(baseurl,provider,organization,repository,apiToken,typeOfPR,knownPRs=None,seenPRs=None):
     hasNextPage = True
     cursor = ''
     result = []
@@ -14,6 +41,7 @@ def getPRList(baseurl,provider,organization,repository,apiToken,typeOfPR):
         'Accept': 'application/json',
         'api-token': apiToken
     }
+    pendingPRs = {prId for prId, pullrequest in knownPRs.items() if isPendingAnalysis(pullrequest)} if knownPRs else set()
     while hasNextPage:
         url = '%s/api/v3/analysis/organizations/%s/%s/repositories/%s/pull-requests?search=%s&%s' % (
             baseurl, provider, organization,repository,typeOfPR,cursor)
@@ -22,6 +50,19 @@ def getPRList(baseurl,provider,organization,repository,apiToken,typeOfPR):
         if 'data' in pullRequests:
             for eachPullRequest in pullRequests['data']:
                 datePR = datetime.strptime(eachPullRequest['pullRequest']['updated'], "%Y-%m-%dT%H:%M:%SZ")
+                ## PRs come ordered by last update, so once we reach one that is unchanged
+                ## since the last snapshot, everything after it is unchanged too,
+                ## except the PRs still pending analysis, which we keep looking for
+                prId = str(eachPullRequest['pullRequest']['id'])
+                if seenPRs is not None:
+                    seenPRs.add(prId)
+                knownPR = knownPRs.get(prId) if knownPRs else None
+                if knownPR is not None and knownPR['date'] == eachPullRequest['pullRequest']['updated'] and prId not in pendingPRs:
+                    if not pendingPRs and seenPRs is None:
+                        hasNextPage=False
+                        break
+                    continue
+                pendingPRs.discard(prId)
                 if (datePR >= currentDate-timedelta(days=93)):
                             result.append(
                                 {
@@ -42,6 +83,8 @@ def getPRList(baseurl,provider,organization,repository,apiToken,typeOfPR):
                 else:
                     hasNextPage=False
                     break
+            if not hasNextPage:
+                break
             hasNextPage = 'cursor' in pullRequests['pagination']
             if hasNextPage:
                 cursor = 'cursor=%s' % pullRequests['pagination']['cursor']
@@ -52,19 +95,13 @@ def getPRList(baseurl,provider,organization,repository,apiToken,typeOfPR):
 def sortByAuthor(e):
     return e['Author']
 
-def generatePRReport(baseurl,provider,organization,repoName,apiToken):
-    tablePROverview = open(f'{organization}-{repoName}-PROverview-lastMonth.csv', 'w')
+def writePRTable(fileName,PRList):
+    tablePROverview = open(fileName, 'w')
     writeTablePROverview = csv.writer(tablePROverview)
     headerTablePROverview = ["Status","Date","id","number","title","Author","New Issues"
                                                    ,"Fixed Issues","Complexity","Duplication",
                                                    "deltaCoverageWithDecimals","diffCoverage"]
     writeTablePROverview.writerow(headerTablePROverview)
-    print("Checking",repoName)
-    ## Closed PR's
-    PRMergedList = getPRList(baseurl,provider,organization,repoName,apiToken,'merged')
-    ## Open PR's
-    PROpenList = getPRList(baseurl,provider,organization,repoName,apiToken,'last-updated')
-    PRList = PRMergedList+PROpenList
     PRList.sort(key=sortByAuthor)
     for pullrequest in PRList:
         PRRow = ["Open" if pullrequest["typeOfPR"] != 'merged' else "Closed",pullrequest["date"],pullrequest["id"],pullrequest["number"],pullrequest["title"],pullrequest["Author"],
@@ -73,6 +110,33 @@ def generatePRReport(baseurl,provider,organization,repoName,apiToken):
         writeTablePROverview.writerow(PRRow)
     tablePROverview.close()
 
+def generatePRReport(baseurl,provider,organization,repoName,apiToken,snapshotFile=None):
+    print("Checking",repoName)
+    snapshot = loadSnapshot(snapshotFile)
+    changedPRList = []
+    currentDate = datetime.now()
+    ## Closed PR's and Open PR's
+    ## the open list is always walked to the end, so PRs closed since the last run can be told apart
+    openPRs = set()
+    for typeOfPR in ['merged','last-updated']:
+        knownPRs = {prId: pullrequest for prId, pullrequest in snapshot.items() if pullrequest['typeOfPR'] == typeOfPR}
+        seenPRs = openPRs if typeOfPR == 'last-updated' else None
+        changedPRs = getPRList(baseurl,provider,organization,repoName,apiToken,typeOfPR,knownPRs,seenPRs)
+        changedPRList += changedPRs
+        snapshot.update({str(pullrequest['id']): pullrequest for pullrequest in changedPRs})
+    ## drop PRs that fell out of the reporting window, and PRs that are no longer open nor merged
+    snapshot = {
+        prId: pullrequest for prId, pullrequest in snapshot.items()
+        if datetime.strptime(pullrequest['date'], "%Y-%m-%dT%H:%M:%SZ") >= currentDate-timedelta(days=93)
+        and (pullrequest['typeOfPR'] != 'last-updated' or prId in openPRs)
+    }
+    PRList = list(snapshot.values())
+    writePRTable(f'{organization}-{repoName}-PROverview-lastMonth.csv',PRList)
+    if snapshotFile is not None:
+        writePRTable(f'{organization}-{repoName}-PROverview-delta.csv',changedPRList)
+        saveSnapshot(snapshotFile,snapshot)
+        print(len(changedPRList),"new or updated PRs since last run")
+
 def main():
     print('Welcome!!\n')
     parser = argparse.ArgumentParser(description='Codacy Integration Helper')
@@ -86,12 +150,14 @@ def main():
                         help='codacy server address (ignore if cloud)')
     parser.add_argument('--repoName', dest='repoName', default=None,
                         help='Repository you want to gather data from')
+    parser.add_argument('--snapshotFile', dest='snapshotFile', default=None,
+                        help='JSON file keeping the PRs seen on previous runs; only new or updated PRs are fetched and a delta report is also written')
 
     args = parser.parse_args()
 
     startdate = time.time()
     if args.repoName != None:
-        generatePRReport(args.baseurl,args.provider,args.organization,args.repoName,args.apiToken)
+        generatePRReport(args.baseurl,args.provider,args.organization,args.repoName,args.apiToken,args.snapshotFile)
     else:
         print("Missing --repoName")
 
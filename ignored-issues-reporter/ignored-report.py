@@ -1,6 +1,12 @@
 import os
+import sys
+import argparse
 import requests
 import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 # Use environment variables
@@ -10,6 +16,7 @@ ORGANIZATION_NAME = os.environ.get("CODACY_ORGANIZATION_NAME")
 REPOSITORY_NAME = os.environ.get("CODACY_REPOSITORY_NAME")
 
 BASE_URL = "https://app.codacy.com/api/v3"
+PAGE_LIMIT = 100
 
 headers = {
     "api-token": CODACY_API_TOKEN,
@@ -17,22 +24,86 @@ headers = {
     "Content-Type": "application/json"
 }
 
-def get_pull_requests(state):
-    url = f"{BASE_URL}/analysis/organizations/{GIT_PROVIDER}/{ORGANIZATION_NAME}/repositories/{REPOSITORY_NAME}/pull-requests"
+class RateLimiter:
+    """Thread-safe limiter spacing requests to at most `requests_per_second`."""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+# Set in batch mode, shared by all the worker threads
+rate_limiter = None
+
+def iter_pages(method, url, params=None, body=None):
+    """Yield every page of a paginated Codacy endpoint, following the pagination cursor.
+
+    Yields None and stops if a request fails, after printing the error.
+    """
+    params = dict(params or {}, limit=PAGE_LIMIT)
+    while True:
+        if rate_limiter:
+            rate_limiter.wait()
+        response = requests.request(method, url, headers=headers, params=params, json=body)
+        if response.status_code != 200:
+            print(f"Error calling {url}: {response.status_code}")
+            print(f"Response: {response.text}")
+            yield None
+            return
+
+        page = response.json()
+        yield page
+
+        cursor = page.get("pagination", {}).get("cursor")
+        if not cursor:
+            return
+        params["cursor"] = cursor
+
+def get_repositories():
+    """Return the names of all the repositories of the organization.
+
+    Raises RuntimeError if any page can't be fetched, so a batch never covers only part of the organization.
+    """
+    url = f"{BASE_URL}/organizations/{GIT_PROVIDER}/{ORGANIZATION_NAME}/repositories"
+
+    print(f"Fetching repositories from: {url}")
+    repositories = []
+    for page in iter_pages("GET", url):
+        if page is None:
+            raise RuntimeError(f"Failed to fetch the repositories of {ORGANIZATION_NAME} "
+                               f"after {len(repositories)} repositories")
+        repositories.extend(repo["name"] for repo in page.get("data", []))
+    return repositories
+
+def get_pull_requests(state, repository=REPOSITORY_NAME, strict=False):
+    """Return the pull requests in `state`, or what was fetched before an error (None if nothing was).
+
+    With strict, a failed request raises RuntimeError instead.
+    """
+    url = f"{BASE_URL}/analysis/organizations/{GIT_PROVIDER}/{ORGANIZATION_NAME}/repositories/{repository}/pull-requests"
     
-    params = {"search": state}
     print(f"Fetching {state} pull requests from: {url}")
-    response = requests.get(url, headers=headers, params=params)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Error fetching {state} pull requests: {response.status_code}")
-        print(f"Response: {response.text}")
-        return None
+    pull_requests = []
+    for page in iter_pages("GET", url, params={"search": state}):
+        if page is None:
+            print(f"Error fetching {state} pull requests")
+            if strict:
+                raise RuntimeError(f"Failed to fetch {state} pull requests of {repository}")
+            return {"data": pull_requests} if pull_requests else None
+        pull_requests.extend(page.get("data", []))
+    return {"data": pull_requests}
 
-def search_ignored_issues(pull_request_number=None):
-    url = f"{BASE_URL}/analysis/organizations/{GIT_PROVIDER}/{ORGANIZATION_NAME}/repositories/{REPOSITORY_NAME}/ignoredIssues/search"
+def iter_ignored_issues(pull_request_number=None, repository=REPOSITORY_NAME):
+    """Yield the ignored issues of the repository (or of one PR), page by page."""
+    url = f"{BASE_URL}/analysis/organizations/{GIT_PROVIDER}/{ORGANIZATION_NAME}/repositories/{repository}/ignoredIssues/search"
     
     body = {}
     if pull_request_number:
@@ -40,14 +111,61 @@ def search_ignored_issues(pull_request_number=None):
     
     print(f"Searching ignored issues from: {url}")
     print(f"Request body: {json.dumps(body)}")
-    response = requests.post(url, headers=headers, json=body)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Error searching ignored issues: {response.status_code}")
-        print(f"Response: {response.text}")
+    for page in iter_pages("POST", url, body=body):
+        if page is None:
+            yield None
+            return
+        yield from page.get("data", [])
+
+def search_ignored_issues(pull_request_number=None, repository=REPOSITORY_NAME):
+    ignored_issues = []
+    for issue in iter_ignored_issues(pull_request_number, repository):
+        if issue is None:
+            print("Error searching ignored issues")
+            return None
+        ignored_issues.append(issue)
+    return {"data": ignored_issues}
+
+# Fields of an ignored issue that single-pass mode reads its branch from
+BRANCH_FIELDS = ("branchName", "branch")
+
+def issue_branch(issue):
+    return next((issue[field] for field in BRANCH_FIELDS if issue.get(field)), None)
+
+def partition_ignored_issues(all_prs, repository=REPOSITORY_NAME):
+    """Scan the repository's ignored issues once and group them by pull request number.
+
+    Issues are matched either by the `pull-request-N` branch name or by the PR's origin branch.
+    Issues that don't belong to any of the given PRs are returned under the `None` key.
+    Returns None if the ignored issues can't be fetched, or if the scan can't be split by pull
+    request because no issue matched a pull request branch or some issue carries no branch.
+    """
+    branch_to_pr = {}
+    for pr_data in all_prs:
+        pr = pr_data.get("pullRequest", {}) if isinstance(pr_data, dict) else {}
+        if "number" in pr:
+            branch_to_pr[f"pull-request-{pr['number']}"] = pr["number"]
+            if pr.get("originBranch"):
+                branch_to_pr.setdefault(pr["originBranch"], pr["number"])
+
+    issues_by_pr = defaultdict(list)
+    for issue in iter_ignored_issues(repository=repository):
+        if issue is None:
+            print("Error searching ignored issues")
+            return None
+        issues_by_pr[branch_to_pr.get(issue_branch(issue))].append(issue)
+
+    fields = " or ".join(f"`{field}`" for field in BRANCH_FIELDS)
+    unbranched = sum(1 for issue in issues_by_pr.get(None, []) if issue_branch(issue) is None)
+    if unbranched:
+        print(f"Warning: {unbranched} ignored issues of {repository} have no {fields} field, "
+              "so they can't be matched to pull requests")
         return None
+    if not any(pr_number is not None for pr_number in issues_by_pr):
+        # The scan may only cover the default branch, so zero issues per PR can't be trusted
+        print(f"Warning: no ignored issue of {repository} has a pull request branch in its {fields} field")
+        return None
+    return issues_by_pr
 
 def generate_report(pull_request_data, ignored_issues):
     if pull_request_data:
@@ -91,60 +209,216 @@ def generate_report(pull_request_data, ignored_issues):
     
     return report
 
+def iter_reports(all_prs, repository=REPOSITORY_NAME):
+    """Yield one report per pull request, searching its ignored issues separately."""
+    if not all_prs:
+        print("No pull requests found. Fetching all ignored issues for the repository.")
+        yield generate_report(None, search_ignored_issues(repository=repository))
+        return
+
+    for pr_data in all_prs:
+        if isinstance(pr_data, dict) and "pullRequest" in pr_data and "number" in pr_data["pullRequest"]:
+            pr_number = pr_data["pullRequest"]["number"]
+            print(f"Processing PR #{pr_number}")
+            
+            ignored_issues = search_ignored_issues(pr_number, repository)
+            yield generate_report(pr_data, ignored_issues)
+        else:
+            print(f"Unexpected PR structure: {pr_data}")
+
+def iter_single_pass_reports(all_prs, repository=REPOSITORY_NAME):
+    """Yield one report per pull request out of a single scan of the repository's ignored issues.
+
+    Falls back to one search per pull request when the scan can't be split by pull request.
+    """
+    if not all_prs:
+        yield from iter_reports(all_prs, repository)
+        return
+
+    issues_by_pr = partition_ignored_issues(all_prs, repository)
+    if issues_by_pr is None:
+        print(f"Searching the ignored issues of each pull request of {repository} instead")
+        yield from iter_reports(all_prs, repository)
+        return
+
+    for pr_data in all_prs:
+        if isinstance(pr_data, dict) and "pullRequest" in pr_data and "number" in pr_data["pullRequest"]:
+            pr_number = pr_data["pullRequest"]["number"]
+            yield generate_report(pr_data, {"data": issues_by_pr.pop(pr_number, [])})
+        else:
+            print(f"Unexpected PR structure: {pr_data}")
+    if issues_by_pr.get(None):
+        yield generate_report(None, {"data": issues_by_pr.pop(None)})
+
+def get_all_pull_requests(repository=REPOSITORY_NAME, strict=False):
+    open_prs = get_pull_requests("last-updated", repository, strict)
+    closed_prs = get_pull_requests("merged", repository, strict)
+
+    all_prs = []
+    if open_prs and "data" in open_prs:
+        all_prs.extend(open_prs["data"])
+    if closed_prs and "data" in closed_prs:
+        all_prs.extend(closed_prs["data"])
+    return all_prs
+
+def collect_repository_reports(repository, single_pass):
+    """Fetch the pull requests and ignored issues of one repository and return its reports.
+
+    Raises RuntimeError if any of them can't be fetched, so the repository isn't reported as complete.
+    """
+    all_prs = get_all_pull_requests(repository, strict=True)
+    print(f"Found {len(all_prs)} pull requests in {repository}.")
+    if single_pass:
+        reports = list(iter_single_pass_reports(all_prs, repository))
+    else:
+        reports = list(iter_reports(all_prs, repository))
+    if any(report["ignored_issues_count"] == "Unable to fetch" for report in reports):
+        raise RuntimeError(f"Failed to fetch the ignored issues of {repository}")
+    return reports
+
+def run_batch(args):
+    """Collect the reports of every repository of the organization concurrently.
+
+    Reports are written as JSON Lines tagged with their repository, in the order repositories complete,
+    and an index file maps each repository to its line range and totals.
+    """
+    global rate_limiter
+    rate_limiter = RateLimiter(args.requests_per_second)
+
+    repositories = get_repositories()
+    print(f"Found {len(repositories)} repositories in {ORGANIZATION_NAME}.")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"codacy_ignored_issues_report_{ORGANIZATION_NAME}_{timestamp}.jsonl"
+    index_filename = f"codacy_ignored_issues_report_{ORGANIZATION_NAME}_{timestamp}_index.json"
+
+    index = {}
+    line_number = 0
+    with open(filename, 'w') as f, ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+        futures = {
+            executor.submit(collect_repository_reports, repository, args.single_pass): repository
+            for repository in repositories
+        }
+        for future in as_completed(futures):
+            repository = futures[future]
+            try:
+                reports = future.result()
+            except Exception as e:
+                print(f"Error processing repository {repository}: {e}")
+                index[repository] = {"error": str(e)}
+                continue
+
+            for report in reports:
+                report["repository"] = repository
+                f.write(json.dumps(report) + "\n")
+            f.flush()
+            index[repository] = {
+                "first_line": line_number + 1 if reports else None,
+                "reports": len(reports),
+                "ignored_issues": sum(len(report["ignored_issues"]) for report in reports),
+            }
+            line_number += len(reports)
+            print(f"Processed {len(index)}/{len(repositories)} repositories")
+
+    with open(index_filename, 'w') as f:
+        json.dump({
+            "organization": ORGANIZATION_NAME,
+            "report_file": filename,
+            "repositories": dict(sorted(index.items())),
+        }, f, indent=2)
+
+    print(f"Report generated and saved to {filename}")
+    print(f"Index saved to {index_filename}")
+    print(f"Total reports generated: {line_number}")
+    print(f"Total ignored issues: {sum(entry.get('ignored_issues', 0) for entry in index.values())}")
+
+def write_jsonl_reports(reports, filename):
+    """Write each report as one JSON line as soon as it is generated. Returns (reports, ignored issues) counts."""
+    total_reports = total_issues = 0
+    with open(filename, 'w') as f:
+        for report in reports:
+            f.write(json.dumps(report) + "\n")
+            f.flush()
+            total_reports += 1
+            total_issues += len(report["ignored_issues"])
+    return total_reports, total_issues
+
+def write_json_reports(reports, filename):
+    """Write the reports as a JSON array, one report at a time. Returns (reports, ignored issues) counts."""
+    total_reports = total_issues = 0
+    with open(filename, 'w') as f:
+        f.write("[")
+        for report in reports:
+            f.write(",\n" if total_reports else "\n")
+            f.write(json.dumps(report, indent=2))
+            total_reports += 1
+            total_issues += len(report["ignored_issues"])
+        f.write("\n]\n")
+    return total_reports, total_issues
+
 def main():
+    parser = argparse.ArgumentParser(description="Codacy ignored issues report generator")
+    parser.add_argument("--single-pass", dest="single_pass", action="store_true",
+                        help="scan the repository's ignored issues once and split them by pull request locally "
+                             "using their branchName (or branch) field, instead of searching once per pull request")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="write one JSON report per line (JSON Lines) instead of a single JSON array")
+    parser.add_argument("--all-repositories", dest="all_repositories", action="store_true",
+                        help="report on every repository of the organization into one JSON Lines file plus an index "
+                             "(CODACY_REPOSITORY_NAME is not needed)")
+    parser.add_argument("--max-workers", dest="max_workers", type=int, default=8,
+                        help="repositories processed concurrently with --all-repositories (default: 8)")
+    parser.add_argument("--requests-per-second", dest="requests_per_second", type=float, default=10,
+                        help="API requests per second shared by all workers with --all-repositories (default: 10)")
+    args = parser.parse_args()
+
     print("Script started.")
     # Check if all required environment variables are set
-    required_vars = ["CODACY_API_TOKEN", "GIT_PROVIDER", "CODACY_ORGANIZATION_NAME", "CODACY_REPOSITORY_NAME"]
+    required_vars = ["CODACY_API_TOKEN", "GIT_PROVIDER", "CODACY_ORGANIZATION_NAME"]
+    if not args.all_repositories:
+        required_vars.append("CODACY_REPOSITORY_NAME")
     missing_vars = [var for var in required_vars if not os.environ.get(var)]
     
     if missing_vars:
         print(f"Error: The following environment variables are not set: {', '.join(missing_vars)}")
         return
 
-    open_prs = get_pull_requests("last-updated")
-    closed_prs = get_pull_requests("merged")
+    if args.all_repositories:
+        try:
+            run_batch(args)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
 
-    all_prs = []
-    if open_prs and "data" in open_prs:
-        all_prs.extend(open_prs["data"])
-    if closed_prs and "data" in closed_prs:
-        all_prs.extend(closed_prs["data"])
+    all_prs = get_all_pull_requests()
 
     print(f"Found {len(all_prs)} pull requests in total.")
 
-    all_reports = []
-    if all_prs:
-        for pr_data in all_prs:
-            if isinstance(pr_data, dict) and "pullRequest" in pr_data and "number" in pr_data["pullRequest"]:
-                pr_number = pr_data["pullRequest"]["number"]
-                print(f"Processing PR #{pr_number}")
-                
-                ignored_issues = search_ignored_issues(pr_number)
-                report = generate_report(pr_data, ignored_issues)
-                all_reports.append(report)
-            else:
-                print(f"Unexpected PR structure: {pr_data}")
+    if args.single_pass:
+        reports = iter_single_pass_reports(all_prs)
     else:
-        print("No pull requests found. Fetching all ignored issues for the repository.")
-        ignored_issues = search_ignored_issues()
-        report = generate_report(None, ignored_issues)
-        all_reports.append(report)
-
-    if not all_reports:
-        print("No reports generated. No ignored issues found in the repository.")
-        return
+        reports = iter_reports(all_prs)
 
     # Generate a timestamp for the filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"codacy_ignored_issues_report_{timestamp}.json"
+    extension = "jsonl" if args.jsonl else "json"
+    filename = f"codacy_ignored_issues_report_{timestamp}.{extension}"
 
-    # Write the report to a file
-    with open(filename, 'w') as f:
-        json.dump(all_reports, f, indent=2)
+    # Write the reports to the file as they are generated
+    if args.jsonl:
+        total_reports, total_issues = write_jsonl_reports(reports, filename)
+    else:
+        total_reports, total_issues = write_json_reports(reports, filename)
+
+    if not total_reports:
+        os.remove(filename)
+        print("No reports generated. No ignored issues found in the repository.")
+        return
 
     print(f"Report generated and saved to {filename}")
-    print(f"Total reports generated: {len(all_reports)}")
-    print(f"Total ignored issues: {sum(len(report['ignored_issues']) for report in all_reports)}")
+    print(f"Total reports generated: {total_reports}")
+    print(f"Total ignored issues: {total_issues}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
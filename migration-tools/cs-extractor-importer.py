@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 import requests
 import json
+import hashlib
+import gzip
 import os
 import sys
 import traceback
 import time
 import logging
 import argparse
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from logging.handlers import RotatingFileHandler
 from typing import List, Dict, Any, Optional, Tuple
+from requests.adapters import HTTPAdapter
 from halo import Halo
 
 # Codacy API endpoints
@@ -19,6 +25,14 @@ CLOUD_API_URL = "https://app.codacy.com/api/v3"
 SELF_HOSTED_API_TOKEN = os.environ.get("SELF_HOSTED_API_TOKEN")
 CLOUD_API_TOKEN = os.environ.get("CLOUD_API_TOKEN")
 
+# Concurrency defaults, can be overridden with --max-workers and --requests-per-second
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+
+# At DEBUG level, request and response bodies are only logged for one request in every N (0 disables them)
+DEFAULT_DEBUG_SAMPLE_EVERY = 50
+LOG_BODY_LIMIT = 1000
+
 # Setup logging
 def setup_logging(log_file="codacy_migration.log", log_level=logging.DEBUG):
     """Set up logging to file and console."""
@@ -27,7 +41,7 @@ def setup_logging(log_file="codacy_migration.log", log_level=logging.DEBUG):
     
     # File handler
     file_handler = RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=3)
-    file_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_format = logging.Formatter('%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(file_format)
     
     # Console handler
@@ -43,9 +57,39 @@ def setup_logging(log_file="codacy_migration.log", log_level=logging.DEBUG):
 # Initialize logger with DEBUG level for more detailed logging
 logger = setup_logging()
 
+class RateLimiter:
+    """Thread-safe limiter spacing API requests to at most `requests_per_second` across all threads."""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+# Shared by every request made by the script, whichever thread it runs on
+rate_limiter = RateLimiter(DEFAULT_REQUESTS_PER_SECOND)
+max_workers = DEFAULT_MAX_WORKERS
+
+def configure_concurrency(workers: int, requests_per_second: float) -> None:
+    """Set the number of worker threads and the global request budget."""
+    global rate_limiter, max_workers
+    max_workers = max(1, workers)
+    rate_limiter = RateLimiter(requests_per_second)
+    logger.info(f"Using up to {max_workers} workers and {requests_per_second} requests per second")
+
+# Turned off while migrations run concurrently
+spinners_enabled = True
+
 def spinner(text: str) -> Halo:
     """Create a spinner with the given text."""
-    return Halo(text=text, spinner='dots')
+    return Halo(text=text, spinner='dots', enabled=spinners_enabled)
 
 def get_user_input(prompt: str, valid_options: List[str] = None) -> str:
     """Get user input with validation."""
@@ -55,39 +99,81 @@ def get_user_input(prompt: str, valid_options: List[str] = None) -> str:
             return value
         print(f"Please enter one of: {', '.join(valid_options)}")
 
-def make_api_request(url: str, method: str = "GET", headers: Dict = None, 
-                    data: Dict = None, params: Dict = None, max_retries: int = 3) -> Optional[Dict]:
-    """Make an API request to Codacy with retry logic."""
+# One pooled session per thread, since sessions aren't guaranteed to be thread-safe
+_thread_local = threading.local()
+
+def get_session() -> requests.Session:
+    """Return the calling thread's HTTP session, reusing its connections across requests."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _thread_local.session = session
+    return session
+
+debug_sample_every = DEFAULT_DEBUG_SAMPLE_EVERY
+_request_counter = itertools.count()
+
+def configure_debug_sampling(sample_every: int) -> None:
+    """Log request and response bodies for one request in every sample_every (0 disables them)."""
+    global debug_sample_every
+    debug_sample_every = max(0, sample_every)
+
+def sample_debug_bodies() -> bool:
+    """Whether the bodies of the current request should be logged."""
+    if not debug_sample_every or not logger.isEnabledFor(logging.DEBUG):
+        return False
+    return next(_request_counter) % debug_sample_every == 0
+
+class LazyLogText:
+    """Log argument that builds and truncates its text only when the record is emitted."""
+
+    def __init__(self, build, limit: int = LOG_BODY_LIMIT):
+        self.build = build
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = self.build()
+        return text if len(text) <= self.limit else f"{text[:self.limit]}... (truncated)"
+
+def api_headers(url: str, headers: Dict = None) -> Dict:
+    """Return the request headers, with the API token matching the URL's environment."""
     if headers is None:
         headers = {}
     headers["Accept"] = "application/json"
     headers["Content-Type"] = "application/json"
     headers["api-token"] = CLOUD_API_TOKEN if url.startswith(CLOUD_API_URL) else SELF_HOSTED_API_TOKEN
+    return headers
+
+def make_api_request(url: str, method: str = "GET", headers: Dict = None, 
+                    data: Dict = None, params: Dict = None, max_retries: int = 3) -> Optional[Dict]:
+    """Make an API request to Codacy with retry logic."""
+    headers = api_headers(url, headers)
 
     retry_count = 0
     while retry_count <= max_retries:
         try:
-            logger.debug(f"Making {method} request to {url}")
-            if data:
-                logger.debug(f"Request data: {json.dumps(data)[:1000]}...")
-            if params:
-                logger.debug(f"Request params: {params}")
+            rate_limiter.wait()
+            log_bodies = sample_debug_bodies()
+            logger.debug("Making %s request to %s params=%s", method, url, params)
+            if data and log_bodies:
+                logger.debug("Request data: %s", LazyLogText(lambda: json.dumps(data)))
                 
-            response = requests.request(method, url, headers=headers, json=data, params=params, timeout=1000)
+            response = get_session().request(method, url, headers=headers, json=data, params=params, timeout=1000)
             response.raise_for_status()
             
             if response.status_code == 204:  # No Content
-                logger.debug(f"Request successful: {response.status_code} No Content")
+                logger.debug("Request successful: %s No Content", response.status_code)
                 return True
-            elif response.text:
-                logger.debug(f"Request successful: {response.status_code}")
-                if len(response.text) < 1000:
-                    logger.debug(f"Response: {response.text}")
-                else:
-                    logger.debug(f"Response (truncated): {response.text[:1000]}...")
+            elif response.content:
+                logger.debug("Request successful: %s", response.status_code)
+                if log_bodies:
+                    logger.debug("Response: %s", LazyLogText(lambda: response.text))
                 return response.json()
             else:
-                logger.debug(f"Request successful but no content: {response.status_code}")
+                logger.debug("Request successful but no content: %s", response.status_code)
                 return None
         except requests.exceptions.RequestException as req_err:
             retry_count += 1
@@ -97,36 +183,237 @@ def make_api_request(url: str, method: str = "GET", headers: Dict = None,
                 time.sleep(wait_time)
             else:
                 logger.error(f"Request failed after {max_retries} retries: {req_err}")
-                if hasattr(req_err, 'response') and req_err.response:
+                # A failed response is falsy, so compare with None
+                if getattr(req_err, 'response', None) is not None:
                     logger.error(f"Response status: {req_err.response.status_code}")
-                    logger.error(f"Response text: {req_err.response.text[:1000]}...")
+                    logger.error("Response text: %s", LazyLogText(lambda: req_err.response.text))
                 return None
 
+def fetch_enabled_patterns(patterns_url: str) -> List[Dict[str, Any]]:
+    """Fetch all enabled patterns of a tool, following pagination."""
+    enabled_patterns = []
+    cursor = None
+
+    while True:
+        params = {"cursor": cursor} if cursor else None
+        patterns_response = make_api_request(patterns_url, params=params)
+
+        if not patterns_response or not patterns_response.get("data"):
+            break
+
+        enabled_patterns.extend(p for p in patterns_response["data"] if p.get("enabled", False))
+
+        # Check for more pages
+        pagination = patterns_response.get("pagination", {})
+        cursor = pagination.get("cursor")
+        if not cursor or cursor == "0":
+            break
+
+    return enabled_patterns
+
+def fetch_tools_patterns(tools_url: str, tool_uuids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Fetch the enabled patterns of several tools concurrently, keyed by tool UUID.
+
+    Requests from all the workers share the global rate limiter.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda tool_uuid: fetch_enabled_patterns(f"{tools_url}/{tool_uuid}/patterns"), tool_uuids)
+        return dict(zip(tool_uuids, results))
+
+class AdaptiveBatcher:
+    """AIMD batch sizing for pattern PATCH requests.
+
+    The batch size grows additively after every accepted request and is halved when the server
+    rejects the payload as too large (413), so a migration settles on the largest batch the API
+    accepts. Thread-safe, so one batcher can be shared by concurrent workers.
+    """
+
+    def __init__(self, initial_size: int = 50, min_size: int = 1, max_size: int = 1000, increase: int = 25):
+        self.size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.increase = increase
+        self.lock = threading.Lock()
+
+    def on_success(self, sent: int) -> None:
+        with self.lock:
+            # Only grow when the full batch size was actually used
+            if sent >= self.size:
+                self.size = min(self.max_size, self.size + self.increase)
+
+    def on_overload(self, sent: int) -> bool:
+        """Shrink after a rejected batch of `sent` patterns. Returns False if it can't shrink any further."""
+        with self.lock:
+            if sent <= self.min_size:
+                return False
+            self.size = max(self.min_size, min(self.size, sent) // 2)
+            return True
+
+# Statuses for which a PATCH is rejected because of the patterns it carries
+VALIDATION_STATUSES = (400, 422)
+# Statuses after which no further request to the tool can succeed
+FATAL_STATUSES = (401, 403, 404)
+
+def is_transient_failure(status: Optional[int]) -> bool:
+    """Whether a request failed because of the connection or an overloaded server (429, 5xx)."""
+    return status is None or status == 429 or status >= 500
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """The delay requested by a Retry-After header given in seconds, if any."""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except (TypeError, ValueError):
+        return None
+
+def patch_tool_patterns(base_url: str, patterns: List[Dict[str, Any]], max_retries: int = 3) -> Optional[int]:
+    """Send one PATCH with pattern updates to a tool, enabling it.
+    
+    Connection errors, 429 and 5xx responses are retried with exponential backoff, waiting as long
+    as the server asks in Retry-After when it gives one. Returns the final status code, or None if
+    the last attempt failed to connect.
+    """
+    body = {"enabled": True, "patterns": patterns}
+    for attempt in range(max_retries + 1):
+        retry_after = None
+        rate_limiter.wait()
+        logger.debug("Making PATCH request to %s with %d patterns", base_url, len(patterns))
+        if sample_debug_bodies():
+            logger.debug("Request data: %s", LazyLogText(lambda: json.dumps(body)))
+        try:
+            response = get_session().request("PATCH", base_url, headers=api_headers(base_url), json=body, timeout=1000)
+            status = response.status_code
+        except requests.exceptions.RequestException as req_err:
+            logger.warning(f"PATCH request to {base_url} failed: {req_err}")
+            status = None
+        else:
+            if status >= 400:
+                logger.warning("PATCH request to %s failed with status %s: %s", base_url, status,
+                               LazyLogText(lambda: response.text))
+            if status == 429:
+                retry_after = retry_after_seconds(response)
+        
+        if not is_transient_failure(status) or attempt == max_retries:
+            return status
+        wait_time = retry_after if retry_after is not None else 2 ** (attempt + 1)  # Exponential backoff
+        logger.warning(f"Retrying PATCH request to {base_url} in {wait_time} seconds")
+        time.sleep(wait_time)
+
+# Tool catalogs of both environments, plus the self-hosted -> cloud name index, are cached in this file
+TOOL_CATALOG_CACHE_FILE = "codacy_tool_catalog.json"
+TOOL_CATALOG_MAX_AGE = 24 * 60 * 60  # seconds
+tool_catalog_cache_file = TOOL_CATALOG_CACHE_FILE
+tool_catalog_max_age = TOOL_CATALOG_MAX_AGE
+tool_catalog_lock = threading.Lock()
+
+# Self-hosted tool names that have a different name in Codacy Cloud, keyed by normalized name
+TOOL_NAME_ALIASES = {
+    "jshint": "JSHint (deprecated)",
+    "pylint(python3)": "Pylint",
+    "sonarvisualbasic": "SonarVB",
+    "eslint(deprecated)": "ESLint"
+}
+
+def configure_tool_catalog_cache(cache_file: Optional[str], max_age: float) -> None:
+    """Set where the tool catalogs are cached and for how long (in seconds) they are reused."""
+    global tool_catalog_cache_file, tool_catalog_max_age
+    tool_catalog_cache_file = cache_file
+    tool_catalog_max_age = max_age
+
+def load_tool_catalog_cache() -> Dict[str, Any]:
+    if not tool_catalog_cache_file or not os.path.exists(tool_catalog_cache_file):
+        return {}
+    try:
+        with open(tool_catalog_cache_file) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable tool catalog cache {tool_catalog_cache_file}: {e}")
+        return {}
+
+def update_tool_catalog_cache(key: str, entry: Dict[str, Any]) -> None:
+    if not tool_catalog_cache_file:
+        return
+    with tool_catalog_lock:
+        cache = load_tool_catalog_cache()
+        cache[key] = entry
+        tmp_file = f"{tool_catalog_cache_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_file, tool_catalog_cache_file)
+
+def get_cached_tool_catalog(key: str, api_url: str) -> Optional[Dict[str, Any]]:
+    """Return the cached catalog for `key`, if it was fetched from the same API recently enough."""
+    entry = load_tool_catalog_cache().get(key)
+    if not entry or entry.get("api_url") != api_url or time.time() - entry.get("fetched_at", 0) > tool_catalog_max_age:
+        return None
+    logger.info(f"Using cached {key} tool catalog from {tool_catalog_cache_file}")
+    return entry
+
+def fetch_tool_catalog(key: str, api_url: str, env_name: str) -> Optional[List[Dict[str, Any]]]:
+    """Return the tools of an environment, from the cache when fresh, otherwise from the API."""
+    cached = get_cached_tool_catalog(key, api_url)
+    if cached:
+        return cached["tools"]
+    
+    with spinner(f"Fetching {key} tools") as spin:
+        tools = make_api_request(f"{api_url}/tools")
+        if not tools or not tools.get("data"):
+            spin.fail(f"Failed to fetch tools from {env_name}")
+            logger.error(f"Failed to fetch tools from {env_name}")
+            return None
+        spin.succeed(f"Successfully fetched {key} tools")
+        logger.info(f"Successfully fetched {len(tools['data'])} {key} tools")
+    
+    catalog = [{"uuid": tool["uuid"], "name": tool["name"]} for tool in tools["data"]]
+    entry = {"api_url": api_url, "fetched_at": time.time(), "tools": catalog}
+    if key == "cloud":
+        entry["name_index"] = build_tool_index({tool["name"]: tool["uuid"] for tool in catalog})
+    update_tool_catalog_cache(key, entry)
+    return catalog
+
 def get_self_hosted_tools() -> Dict[str, str]:
     """Fetch tools from self-hosted Codacy."""
-    with spinner("Fetching self-hosted tools") as spin:
-        url = f"{SELF_HOSTED_API_URL}/tools"
-        tools = make_api_request(url)
-        if not tools or not tools.get("data"):
-            spin.fail("Failed to fetch tools from self-hosted Codacy")
-            logger.error("Failed to fetch tools from self-hosted Codacy")
-            return {}
-        spin.succeed("Successfully fetched self-hosted tools")
-        logger.info(f"Successfully fetched {len(tools['data'])} self-hosted tools")
-        return {tool["uuid"]: tool["name"] for tool in tools["data"]}
+    tools = fetch_tool_catalog("self-hosted", SELF_HOSTED_API_URL, "self-hosted Codacy")
+    return {tool["uuid"]: tool["name"] for tool in tools or []}
 
 def get_cloud_tools() -> Dict[str, str]:
     """Fetch tools from Codacy Cloud."""
-    with spinner("Fetching cloud tools") as spin:
-        url = f"{CLOUD_API_URL}/tools"
-        tools = make_api_request(url)
-        if not tools or not tools.get("data"):
-            spin.fail("Failed to fetch tools from Codacy Cloud")
-            logger.error("Failed to fetch tools from Codacy Cloud")
-            return {}
-        spin.succeed("Successfully fetched cloud tools")
-        logger.info(f"Successfully fetched {len(tools['data'])} cloud tools")
-        return {tool["name"]: tool["uuid"] for tool in tools["data"]}
+    tools = fetch_tool_catalog("cloud", CLOUD_API_URL, "Codacy Cloud")
+    return {tool["name"]: tool["uuid"] for tool in tools or []}
+
+def normalize_tool_name(name: str) -> str:
+    """Normalize a tool name for matching: case, spaces and the deprecated suffix are ignored."""
+    return name.lower().replace("(deprecated)", "").replace(" ", "")
+
+def build_tool_index(cloud_tools: Dict[str, str]) -> Dict[str, List[str]]:
+    """Index cloud tools by exact and normalized name, mapping to [uuid, name].
+
+    When two cloud tools normalize to the same name, the non-deprecated one wins.
+    """
+    index = {}
+    # Deprecated tools go first so the non-deprecated ones overwrite them
+    for cloud_name, cloud_uuid in sorted(cloud_tools.items(), key=lambda item: "(deprecated)" not in item[0]):
+        index[normalize_tool_name(cloud_name)] = [cloud_uuid, cloud_name]
+    # Exact names take precedence over normalized ones
+    for cloud_name, cloud_uuid in cloud_tools.items():
+        index[cloud_name] = [cloud_uuid, cloud_name]
+    return index
+
+_tool_index_source = None
+_tool_index = {}
+
+def get_tool_index(cloud_tools: Dict[str, str]) -> Dict[str, List[str]]:
+    """Return the name index of `cloud_tools`, reusing the cached one when the catalog is unchanged."""
+    global _tool_index_source, _tool_index
+    with tool_catalog_lock:
+        if _tool_index_source is not cloud_tools:
+            cached = load_tool_catalog_cache().get("cloud", {})
+            cached_tools = {tool["name"]: tool["uuid"] for tool in cached.get("tools", [])}
+            if cached.get("name_index") and cached_tools == cloud_tools:
+                _tool_index = cached["name_index"]
+            else:
+                _tool_index = build_tool_index(cloud_tools)
+            _tool_index_source = cloud_tools
+        return _tool_index
 
 def map_sh_to_cloud_tool(sh_uuid: str, sh_tools: Dict[str, str], 
                         cloud_tools: Dict[str, str]) -> Tuple[Optional[str], Optional[str]]:
@@ -135,33 +422,20 @@ def map_sh_to_cloud_tool(sh_uuid: str, sh_tools: Dict[str, str],
     if not sh_name:
         return None, None
 
-    # Handle special cases and deprecated tools
-    tool_mappings = {
-        "JSHint": "JSHint (deprecated)",
-        "Pylint (Python 3)": "Pylint",
-        "Sonar C#": "SonarC#",
-        "Sonar Visual Basic": "SonarVB",
-        "ESLint (deprecated)": "ESLint"
-    }
-    
-    sh_name = tool_mappings.get(sh_name, sh_name)
-
-    # Find matching cloud tool
-    for cloud_name, cloud_uuid in cloud_tools.items():
-        if cloud_name == sh_name:
+    index = get_tool_index(cloud_tools)
+    normalized_name = normalize_tool_name(sh_name)
+    # Handle special cases and deprecated tools, then exact and normalized names
+    alias = TOOL_NAME_ALIASES.get(sh_name.lower().replace(" ", ""))
+    for key in (alias, sh_name, normalized_name):
+        if key and key in index:
+            cloud_uuid, cloud_name = index[key]
             return cloud_uuid, cloud_name
 
-    # Try without "(deprecated)" suffix
-    if "(deprecated)" in sh_name:
-        non_deprecated_name = sh_name.replace(" (deprecated)", "")
-        for cloud_name, cloud_uuid in cloud_tools.items():
-            if cloud_name == non_deprecated_name:
-                return cloud_uuid, cloud_name
-
     return None, None
 
-def get_coding_standards(organization: str, provider: str, is_self_hosted: bool = False) -> List[Dict[str, Any]]:
-    """Fetch non-draft coding standards from Codacy API."""
+def get_coding_standards(organization: str, provider: str, is_self_hosted: bool = False,
+                         include_drafts: bool = False) -> List[Dict[str, Any]]:
+    """Fetch non-draft coding standards (or all of them, with include_drafts) from Codacy API."""
     base_url = SELF_HOSTED_API_URL if is_self_hosted else CLOUD_API_URL
     env_type = "self-hosted" if is_self_hosted else "cloud"
     with spinner(f"Fetching coding standards from {env_type}") as spin:
@@ -177,10 +451,11 @@ def get_coding_standards(organization: str, provider: str, is_self_hosted: bool
                 
             all_standards = response['data']
             coding_standards = [standard for standard in all_standards 
-                              if not standard.get('isDraft', False)]
+                              if include_drafts or not standard.get('isDraft', False)]
             
-            spin.succeed(f"Fetched {len(coding_standards)} active coding standards")
-            logger.info(f"Fetched {len(coding_standards)} active coding standards from {env_type}")
+            kind = "" if include_drafts else "active "
+            spin.succeed(f"Fetched {len(coding_standards)} {kind}coding standards")
+            logger.info(f"Fetched {len(coding_standards)} {kind}coding standards from {env_type}")
             return coding_standards
         except Exception as e:
             error_msg = f"Error fetching coding standards from {env_type}: {str(e)}"
@@ -199,8 +474,25 @@ def display_coding_standards(standards: List[Dict[str, Any]]) -> None:
         print(f"   Languages: {', '.join(standard.get('languages', []))}")
         print("-" * 80)
 
-def select_coding_standard(standards: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Let user select a coding standard."""
+def find_coding_standard(standards: List[Dict[str, Any]], selector: str) -> Dict[str, Any]:
+    """Find a coding standard by ID or by name (case-insensitive) without prompting."""
+    selector = str(selector).strip()
+    for standard in standards:
+        if str(standard.get("id")) == selector:
+            return standard
+    
+    matches = [standard for standard in standards if standard.get("name", "").lower() == selector.lower()]
+    if len(matches) > 1:
+        raise Exception(f"Coding standard name '{selector}' is ambiguous, use its ID instead")
+    if not matches:
+        raise Exception(f"Coding standard '{selector}' not found")
+    return matches[0]
+
+def select_coding_standard(standards: List[Dict[str, Any]], selector: Optional[str] = None) -> Dict[str, Any]:
+    """Let user select a coding standard, or pick the one matching selector when given."""
+    if selector is not None:
+        return find_coding_standard(standards, selector)
+    
     display_coding_standards(standards)
     while True:
         try:
@@ -212,7 +504,7 @@ def select_coding_standard(standards: List[Dict[str, Any]]) -> Dict[str, Any]:
             print("Please enter a valid number")
 
 def extract_coding_standard(provider: str, org_name: str, is_self_hosted: bool = False, 
-                          output_file: str = None) -> Dict[str, Any]:
+                          output_file: str = None, standard_selector: Optional[str] = None) -> Dict[str, Any]:
     """Extract coding standard configuration from Codacy."""
     base_url = SELF_HOSTED_API_URL if is_self_hosted else CLOUD_API_URL
     env_type = "self-hosted" if is_self_hosted else "cloud"
@@ -229,8 +521,8 @@ def extract_coding_standard(provider: str, org_name: str, is_self_hosted: bool =
             logger.error(f"No coding standards found in {env_type} organization {org_name}")
             raise Exception("No coding standards found")
         
-        # Let user select the standard
-        coding_standard = select_coding_standard(standards)
+        # Let user select the standard, unless it was given up front
+        coding_standard = select_coding_standard(standards, standard_selector)
         comprehensive_data["coding_standard"] = coding_standard
         logger.info(f"Selected coding standard: {coding_standard.get('name', 'Unknown')}")
         print(f"Using coding standard: {coding_standard.get('name', 'Unknown')}")
@@ -248,53 +540,53 @@ def extract_coding_standard(provider: str, org_name: str, is_self_hosted: bool =
         logger.info(f"Found {len(enabled_tools)} enabled tools in {env_type} organization")
         print(f"Found {len(enabled_tools)} enabled tools")
         
-        # Get patterns for each enabled tool
+        if is_self_hosted:
+            # Self-hosted tool UUIDs differ from the cloud ones, so tools are saved under their cloud UUID
+            self_hosted_tools = get_self_hosted_tools()
+            cloud_tools = get_cloud_tools()
+            if not self_hosted_tools or not cloud_tools:
+                raise Exception("Failed to fetch the tool catalogs needed to map self-hosted tools to Codacy Cloud")
+        
+        # Get patterns for all enabled tools concurrently
         comprehensive_data["tools"] = []
+        with spinner(f"Fetching patterns for {len(enabled_tools)} tools") as spin:
+            tools_patterns = fetch_tools_patterns(url, [tool["uuid"] for tool in enabled_tools])
+            spin.succeed(f"Fetched patterns for {len(enabled_tools)} tools")
         
         for tool in enabled_tools:
             tool_uuid = tool["uuid"]
             tool_name = tool.get("name", f"Tool_{tool_uuid}")
+            all_patterns = tools_patterns[tool_uuid]
             
-            with spinner(f"Processing tool: {tool_name}") as spin:
-                # Get patterns
-                patterns_url = f"{url}/{tool_uuid}/patterns"
-                all_patterns = []
-                cursor = None
-                
-                while True:
-                    params = {"cursor": cursor} if cursor else None
-                    patterns_response = make_api_request(patterns_url, params=params)
-                    
-                    if not patterns_response or not patterns_response.get("data"):
-                        break
-                    
-                    # Add patterns from this page
-                    enabled_patterns = [p for p in patterns_response["data"] if p.get("enabled", False)]
-                    all_patterns.extend(enabled_patterns)
-                    
-                    # Check for more pages
-                    pagination = patterns_response.get("pagination", {})
-                    cursor = pagination.get("cursor")
-                    if not cursor or cursor == "0":
-                        break
-                    
-                    time.sleep(1)  # Rate limiting
-                
-                if all_patterns:
-                    tool_data = {
-                        "uuid": tool_uuid,
-                        "name": tool_name,
-                        "patterns": all_patterns
-                    }
-                    comprehensive_data["tools"].append(tool_data)
-                    spin.succeed(f"Found {len(all_patterns)} enabled patterns")
-                    logger.info(f"Found {len(all_patterns)} enabled patterns for tool {tool_name}")
-                else:
-                    spin.info("No enabled patterns found")
-                    logger.info(f"No enabled patterns found for tool {tool_name}")
+            if is_self_hosted:
+                cloud_tool_uuid, cloud_tool_name = map_sh_to_cloud_tool(tool_uuid, self_hosted_tools, cloud_tools)
+                if not cloud_tool_uuid:
+                    print(f"{tool_name}: no matching cloud tool found, skipping")
+                    logger.warning(f"No matching cloud tool found for {tool_name}")
+                    continue
+                logger.info(f"Mapped self-hosted tool {tool_name} to cloud tool {cloud_tool_name}")
+                tool_uuid, tool_name = cloud_tool_uuid, cloud_tool_name
+            
+            if all_patterns:
+                tool_data = {
+                    "uuid": tool_uuid,
+                    "name": tool_name,
+                    "patterns": all_patterns
+                }
+                comprehensive_data["tools"].append(tool_data)
+                print(f"{tool_name}: found {len(all_patterns)} enabled patterns")
+                logger.info(f"Found {len(all_patterns)} enabled patterns for tool {tool_name}")
+            else:
+                print(f"{tool_name}: no enabled patterns found")
+                logger.info(f"No enabled patterns found for tool {tool_name}")
         
         # Save to file if output_file is provided
-        if output_file:
+        if output_file and is_snapshot_file(output_file):
+            write_snapshot(output_file, coding_standard,
+                           ((tool["uuid"], tool["name"], tool["patterns"]) for tool in comprehensive_data["tools"]))
+            print(f"\nCoding standard snapshot saved to {output_file}")
+            logger.info(f"Coding standard snapshot saved to {output_file}")
+        elif output_file:
             with open(output_file, 'w') as f:
                 json.dump(comprehensive_data, f, indent=2)
             print(f"\nCoding standard configuration saved to {output_file}")
@@ -310,7 +602,7 @@ def extract_coding_standard(provider: str, org_name: str, is_self_hosted: bool =
         return None
 
 def get_self_hosted_data(provider: str, remote_org_name: str, self_hosted_tools: Dict[str, str], 
-                        cloud_tools: Dict[str, str]) -> Optional[Dict[str, Any]]:
+                        cloud_tools: Dict[str, str], standard_selector: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """Fetch data from self-hosted Codacy."""
     if not SELF_HOSTED_API_TOKEN:
         logger.error("SELF_HOSTED_API_TOKEN is not set")
@@ -325,8 +617,8 @@ def get_self_hosted_data(provider: str, remote_org_name: str, self_hosted_tools:
             logger.error("No coding standards found in self-hosted environment")
             raise Exception("No coding standards found")
         
-        # Let user select the standard
-        coding_standard = select_coding_standard(standards)
+        # Let user select the standard, unless it was given up front
+        coding_standard = select_coding_standard(standards, standard_selector)
         comprehensive_data["coding_standard"] = coding_standard
         logger.info(f"Selected coding standard: {coding_standard.get('name', 'Unknown')}")
         print(f"Using coding standard: {coding_standard.get('name', 'Unknown')}")
@@ -396,7 +688,8 @@ def get_self_hosted_data(provider: str, remote_org_name: str, self_hosted_tools:
         traceback.print_exc()
         return None
 
-def get_source_cloud_data(provider: str, source_org_name: str) -> Optional[Dict[str, Any]]:
+def get_source_cloud_data(provider: str, source_org_name: str,
+                          standard_selector: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """Fetch configuration data from source Cloud organization."""
     comprehensive_data = {}
     
@@ -407,8 +700,8 @@ def get_source_cloud_data(provider: str, source_org_name: str) -> Optional[Dict[
             logger.error(f"No coding standards found in cloud organization {source_org_name}")
             raise Exception("No coding standards found")
         
-        # Let user select the standard
-        coding_standard = select_coding_standard(standards)
+        # Let user select the standard, unless it was given up front
+        coding_standard = select_coding_standard(standards, standard_selector)
         comprehensive_data["coding_standard"] = coding_standard
         logger.info(f"Selected coding standard: {coding_standard['name']}")
         print(f"Using coding standard: {coding_standard['name']}")
@@ -425,46 +718,25 @@ def get_source_cloud_data(provider: str, source_org_name: str) -> Optional[Dict[
         logger.info(f"Found {len(enabled_tools)} enabled tools in cloud organization")
         print(f"Found {len(enabled_tools)} enabled tools")
         
-        # Get patterns for each enabled tool
+        # Get patterns for all enabled tools concurrently
         comprehensive_data["tool_patterns"] = {}
+        logger.info(f"Fetching patterns for {len(enabled_tools)} tools")
+        tools_patterns = fetch_tools_patterns(url, [tool["uuid"] for tool in enabled_tools])
+        
         for tool in enabled_tools:
             tool_uuid = tool["uuid"]
             tool_name = tool.get("name", f"Tool_{tool_uuid}")
-            logger.info(f"Fetching patterns for tool {tool_name}")
-            all_patterns = []
-            cursor = None
-            
-            while True:
-                params = {"cursor": cursor} if cursor else None
-                patterns_url = f"{url}/{tool_uuid}/patterns"
-                patterns_response = make_api_request(patterns_url, params=params)
-                
-                if not patterns_response or not patterns_response.get("data"):
-                    break
-                    
-                # Add patterns from this page
-                new_patterns = []
-                for pattern in patterns_response["data"]:
-                    pattern_def = pattern.get("patternDefinition", {})
-                    if pattern_def and pattern.get("enabled", False):
-                        pattern_entry = {
-                            "patternDefinition": {
-                                "id": pattern_def.get("id")
-                            },
-                            "enabled": True,
-                            "parameters": pattern.get("parameters", [])
-                        }
-                        new_patterns.append(pattern_entry)
-                
-                all_patterns.extend(new_patterns)
-                
-                # Check for more pages
-                pagination = patterns_response.get("pagination", {})
-                cursor = pagination.get("cursor")
-                if not cursor or cursor == "0":
-                    break
-                    
-                time.sleep(1)  # Rate limiting
+            all_patterns = [
+                {
+                    "patternDefinition": {
+                        "id": pattern["patternDefinition"]["id"]
+                    },
+                    "enabled": True,
+                    "parameters": pattern.get("parameters", [])
+                }
+                for pattern in tools_patterns[tool_uuid]
+                if pattern.get("patternDefinition")
+            ]
             
             if all_patterns:
                 comprehensive_data["tool_patterns"][tool_uuid] = {
@@ -535,252 +807,172 @@ def promote_coding_standard(provider: str, cloud_org_name: str, standard_id: str
             logger.error("Failed to promote coding standard")
             return False
 
+def set_default_coding_standard(provider: str, cloud_org_name: str, standard_id: str) -> bool:
+    """Make the coding standard the default of the organization, applied to new repositories."""
+    logger.info(f"Making coding standard {standard_id} the default for {cloud_org_name}")
+    with spinner("Making coding standard the default") as spin:
+        url = f"{CLOUD_API_URL}/organizations/{provider}/{cloud_org_name}/coding-standards/{standard_id}/setDefault"
+        result = make_api_request(url, method="POST", data={"isDefault": True})
+        if result is not None:
+            spin.succeed("Coding standard is now the default")
+            logger.info("Coding standard is now the default")
+            return True
+        else:
+            spin.fail("Failed to make coding standard the default")
+            logger.error("Failed to make coding standard the default")
+            return False
+
+def pattern_set_digest(patterns: Dict[str, List[Dict[str, Any]]]) -> str:
+    """Order-independent fingerprint of a tool's enabled patterns and their parameters."""
+    digest = hashlib.sha256()
+    for pattern_id in sorted(patterns):
+        parameters = sorted(normalize_parameters(patterns[pattern_id]).items(), key=lambda item: str(item[0]))
+        digest.update(json.dumps([pattern_id, parameters], sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+def fetch_pattern_sets(tools_url: str, tool_uuids: List[str]) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    """Fetch the enabled patterns of several tools concurrently, as {tool uuid: {pattern id: parameters}}."""
+    return {
+        tool_uuid: {
+            pattern["patternDefinition"]["id"]: pattern.get("parameters", [])
+            for pattern in patterns
+            if pattern.get("patternDefinition", {}).get("id")
+        }
+        for tool_uuid, patterns in fetch_tools_patterns(tools_url, tool_uuids).items()
+    }
+
 def validate_migration(provider: str, dest_org: str, standard_id: str, source_data: Dict[str, Any], 
-                     attempt: int = 1, max_attempts: int = 3) -> bool:
-    """Validate that the migration was successful by comparing source and destination."""
-    logger.info(f"Validating migration for {dest_org} (attempt {attempt}/{max_attempts})")
-    print(f"\nValidating migration for {dest_org} (attempt {attempt}/{max_attempts})...")
-    
-    # Get destination tools
+                     max_attempts: int = 3) -> bool:
+    """Validate that the migration was successful by comparing source and destination.
+
+    Every tool is checked: the destination's enabled patterns are fetched concurrently and their
+    digest compared with the source's. Only tools whose digests differ are diffed pattern by pattern
+    and repaired, and only those are fetched again on the next attempt.
+    """
     url = f"{CLOUD_API_URL}/organizations/{provider}/{dest_org}/coding-standards/{standard_id}/tools"
-    dest_tools_response = make_api_request(url)
-    
-    if not dest_tools_response or not dest_tools_response.get("data"):
-        logger.error("Failed to fetch destination tools for validation")
-        print("Failed to fetch destination tools for validation")
-        return False
-        
-    dest_tools = [tool for tool in dest_tools_response["data"] if tool.get("isEnabled", False)]
-    
-    # Compare tool counts
-    source_tool_count = len(source_data["tool_patterns"])
-    dest_tool_count = len(dest_tools)
-    
-    logger.info(f"Source tools: {source_tool_count}, Destination tools: {dest_tool_count}")
-    
-    if source_tool_count != dest_tool_count:
-        logger.warning(f"Tool count mismatch: Source has {source_tool_count}, Destination has {dest_tool_count}")
-        # Log the tools that are missing
-        source_tool_uuids = set(source_data["tool_patterns"].keys())
-        dest_tool_uuids = {tool["uuid"] for tool in dest_tools}
-        
-        missing_in_dest = source_tool_uuids - dest_tool_uuids
-        missing_in_source = dest_tool_uuids - source_tool_uuids
-        
-        if missing_in_dest:
-            logger.warning(f"Tools in source but missing in destination: {missing_in_dest}")
-        if missing_in_source:
-            logger.warning(f"Tools in destination but missing in source: {missing_in_source}")
-    
-    # Compare patterns for each tool
-    validation_results = []
-    tools_to_fix = []
-    
-    # Limit the number of tools to check to avoid excessive API calls
-    max_tools_to_check = 10
-    if len(dest_tools) > max_tools_to_check:
-        logger.info(f"Limiting validation to {max_tools_to_check} tools to avoid excessive API calls")
-        dest_tools = dest_tools[:max_tools_to_check]
+    source_sets = {
+        tool_uuid: {pattern["patternDefinition"]["id"]: pattern.get("parameters", []) for pattern in tool_data["patterns"]}
+        for tool_uuid, tool_data in source_data["tool_patterns"].items()
+    }
+    source_digests = {tool_uuid: pattern_set_digest(patterns) for tool_uuid, patterns in source_sets.items()}
+    tools_to_check = list(source_sets)
+    mismatches = {}
     
-    for dest_tool in dest_tools:
-        tool_uuid = dest_tool["uuid"]
-        tool_name = dest_tool.get("name", tool_uuid)
-        
-        # Skip if tool not in source
-        if tool_uuid not in source_data["tool_patterns"]:
-            logger.warning(f"Tool {tool_name} not found in source data")
-            continue
-            
-        # Get destination patterns
-        patterns_url = f"{url}/{tool_uuid}/patterns"
-        dest_patterns = []
-        cursor = None
-        
-        # Limit the number of pages to fetch to avoid excessive API calls
-        max_pages = 10
-        page_count = 0
-        
-        while page_count < max_pages:
-            page_count += 1
-            params = {"cursor": cursor} if cursor else None
-            patterns_response = make_api_request(patterns_url, params=params)
-            
-            if not patterns_response or not patterns_response.get("data"):
-                break
-                
-            dest_patterns.extend([p for p in patterns_response["data"] if p.get("enabled", False)])
-            
-            # Check for more pages
-            pagination = patterns_response.get("pagination", {})
-            cursor = pagination.get("cursor")
-            if not cursor or cursor == "0":
-                break
-                
-            time.sleep(1)  # Rate limiting
+    for attempt in range(1, max_attempts + 1):
+        logger.info(f"Validating migration for {dest_org} (attempt {attempt}/{max_attempts})")
+        print(f"\nValidating migration for {dest_org} (attempt {attempt}/{max_attempts})...")
         
-        # Compare pattern counts
-        source_patterns = source_data["tool_patterns"][tool_uuid]["patterns"]
-        source_pattern_count = len(source_patterns)
-        dest_pattern_count = len(dest_patterns)
+        # Get destination tools
+        dest_tools_response = make_api_request(url)
+        if not dest_tools_response or not dest_tools_response.get("data"):
+            logger.error("Failed to fetch destination tools for validation")
+            print("Failed to fetch destination tools for validation")
+            return False
         
-        logger.info(f"Tool {tool_name}: Source patterns: {source_pattern_count}, Destination patterns: {dest_pattern_count}")
+        dest_enabled_tools = {tool["uuid"] for tool in dest_tools_response["data"] if tool.get("isEnabled", False)}
+        extra_tools = dest_enabled_tools - set(source_sets)
+        if extra_tools:
+            logger.warning(f"Tools in destination but missing in source: {extra_tools}")
         
-        # If pattern counts don't match, log detailed information
-        if source_pattern_count != dest_pattern_count:
-            logger.warning(f"Pattern count mismatch for tool {tool_name}")
-            
-            # Get pattern IDs for comparison
-            source_pattern_ids = {p["patternDefinition"]["id"] for p in source_patterns}
-            dest_pattern_ids = {p["patternDefinition"]["id"] for p in dest_patterns}
-            
-            missing_in_dest = source_pattern_ids - dest_pattern_ids
-            missing_in_source = dest_pattern_ids - source_pattern_ids
+        # Compare each tool's digest, and diff only the tools that differ
+        dest_sets = fetch_pattern_sets(url, tools_to_check)
+        mismatches = {}
+        for tool_uuid in tools_to_check:
+            tool_name = source_data["tool_patterns"][tool_uuid]["name"]
+            tool_enabled = tool_uuid in dest_enabled_tools
+            if tool_enabled and pattern_set_digest(dest_sets[tool_uuid]) == source_digests[tool_uuid]:
+                continue
             
-            if missing_in_dest:
-                logger.warning(f"Patterns in source but missing in destination for {tool_name}: {list(missing_in_dest)[:10]}")
-                if len(missing_in_dest) > 10:
-                    logger.warning(f"... and {len(missing_in_dest) - 10} more")
-                
-                # Add to list of tools to fix
-                missing_patterns = [p for p in source_patterns if p["patternDefinition"]["id"] in missing_in_dest]
-                # Limit the number of patterns to fix to avoid excessive API calls
-                if len(missing_patterns) > 20:
-                    logger.info(f"Limiting fix to 20 patterns for {tool_name}")
-                    missing_patterns = missing_patterns[:20]
-                
-                tools_to_fix.append({
-                    "tool_uuid": tool_uuid,
-                    "tool_name": tool_name,
-                    "missing_patterns": missing_patterns
-                })
+            changes = diff_tool_patterns(dest_sets[tool_uuid], source_sets[tool_uuid])
+            if tool_enabled and not changes:
+                # Only the destination's default parameter values differ from the source
+                continue
             
-            if missing_in_source:
-                logger.warning(f"Patterns in destination but missing in source for {tool_name}: {list(missing_in_source)[:10]}")
-                if len(missing_in_source) > 10:
-                    logger.warning(f"... and {len(missing_in_source) - 10} more")
+            if not tool_enabled:
+                logger.warning(f"Tool {tool_name} is not enabled in destination")
+            missing = [change["id"] for change in changes if change["enabled"] and change["id"] not in dest_sets[tool_uuid]]
+            extra = [change["id"] for change in changes if not change["enabled"]]
+            reconfigured = len(changes) - len(missing) - len(extra)
+            logger.warning(f"{tool_name}: {len(missing)} patterns missing, {len(extra)} extra, "
+                           f"{reconfigured} with different parameters in destination")
+            if missing:
+                logger.warning(f"Patterns in source but missing in destination for {tool_name}: {missing[:10]}")
+            if extra:
+                logger.warning(f"Patterns in destination but missing in source for {tool_name}: {extra[:10]}")
+            mismatches[tool_uuid] = {
+                "tool_uuid": tool_uuid,
+                "tool_name": tool_name,
+                "missing_patterns": changes,
+                "source_patterns": len(source_sets[tool_uuid]),
+                "dest_patterns": len(dest_sets[tool_uuid]),
+            }
         
-        validation_results.append({
-            "tool_name": tool_name,
-            "tool_uuid": tool_uuid,
-            "source_patterns": source_pattern_count,
-            "dest_patterns": dest_pattern_count,
-            "match": source_pattern_count == dest_pattern_count
-        })
-    
-    # Print validation summary
-    print("\nValidation Summary:")
-    print("-" * 80)
-    all_match = True
-    
-    for result in validation_results:
-        match_status = "✓" if result["match"] else "✗"
-        print(f"{match_status} {result['tool_name']}: {result['source_patterns']} patterns -> {result['dest_patterns']} patterns")
-        if not result["match"]:
-            all_match = False
-    
-    print("-" * 80)
-    print(f"Overall validation: {'Passed' if all_match else 'Failed'}")
-    
-    # Try to fix missing patterns if validation failed and we haven't exceeded max attempts
-    if not all_match and tools_to_fix and attempt < max_attempts:
-        print(f"\nAttempting to fix missing patterns (attempt {attempt}/{max_attempts})...")
-        fix_missing_patterns(provider, dest_org, standard_id, tools_to_fix)
+        # Print validation summary
+        print("\nValidation Summary:")
+        print("-" * 80)
+        for tool_uuid in tools_to_check:
+            tool_name = source_data["tool_patterns"][tool_uuid]["name"]
+            match_status = "✗" if tool_uuid in mismatches else "✓"
+            print(f"{match_status} {tool_name}: {len(source_sets[tool_uuid])} patterns -> {len(dest_sets[tool_uuid])} patterns")
+        print("-" * 80)
+        print(f"Overall validation: {'Passed' if not mismatches else 'Failed'}")
         
-        # Re-validate after fixing with incremented attempt counter
-        print(f"\nRe-validating after fixes...")
-        return validate_migration(provider, dest_org, standard_id, source_data, attempt + 1, max_attempts)
-    
-    if all_match:
-        logger.info(f"Validation passed for {dest_org}")
-    else:
-        logger.warning(f"Validation failed for {dest_org}")
-        # Log detailed information about failed validations
-        failed_validations = [r for r in validation_results if not r["match"]]
-        logger.warning(f"Failed validations: {json.dumps(failed_validations, indent=2)}")
+        if not mismatches:
+            logger.info(f"Validation passed for {dest_org}")
+            return True
         
-        if attempt >= max_attempts:
-            logger.warning(f"Maximum validation attempts ({max_attempts}) reached. Some patterns may not have been migrated successfully.")
-            print(f"\nMaximum validation attempts ({max_attempts}) reached. Some patterns may not have been migrated successfully.")
-            print("The migration will be considered partially successful.")
+        if attempt < max_attempts:
+            print(f"\nAttempting to fix {len(mismatches)} tools (attempt {attempt}/{max_attempts})...")
+            fix_missing_patterns(provider, dest_org, standard_id, list(mismatches.values()))
+            tools_to_check = list(mismatches)
     
-    return all_match
+    logger.warning(f"Validation failed for {dest_org}")
+    failed_validations = [
+        {key: mismatch[key] for key in ("tool_name", "tool_uuid", "source_patterns", "dest_patterns")}
+        for mismatch in mismatches.values()
+    ]
+    logger.warning(f"Failed validations: {json.dumps(failed_validations, indent=2)}")
+    logger.warning(f"Maximum validation attempts ({max_attempts}) reached. Some patterns may not have been migrated successfully.")
+    print(f"\nMaximum validation attempts ({max_attempts}) reached. Some patterns may not have been migrated successfully.")
+    print("The migration will be considered partially successful.")
+    return False
 
 def fix_missing_patterns(provider: str, dest_org: str, standard_id: str, tools_to_fix: List[Dict[str, Any]]) -> None:
-    """Fix missing patterns by adding them individually."""
+    """Fix mismatched patterns, grouping each tool's updates into as few PATCH requests as possible.
+
+    Each entry of `missing_patterns` is a pattern update as built by `diff_tool_patterns`. Rejected
+    batches are bisected so only the failing patterns are retried on their own.
+    """
+    batcher = AdaptiveBatcher()
     for tool_info in tools_to_fix:
         tool_uuid = tool_info["tool_uuid"]
         tool_name = tool_info["tool_name"]
         missing_patterns = tool_info["missing_patterns"]
         
-        print(f"Fixing {len(missing_patterns)} missing patterns for {tool_name}...")
-        logger.info(f"Fixing {len(missing_patterns)} missing patterns for {tool_name}")
+        print(f"Fixing {len(missing_patterns)} mismatched patterns for {tool_name}...")
+        logger.info(f"Fixing {len(missing_patterns)} mismatched patterns for {tool_name}")
         
         base_url = f"{CLOUD_API_URL}/organizations/{provider}/{dest_org}/coding-standards/{standard_id}/tools/{tool_uuid}"
         
-        # Process each pattern individually for maximum reliability
-        for i, pattern in enumerate(missing_patterns):
-            pattern_id = pattern["patternDefinition"]["id"]
-            print(f"Adding pattern {i+1}/{len(missing_patterns)}: {pattern_id}")
-            
-            pattern_entry = {
-                "id": pattern_id,
-                "enabled": True
-            }
-            
-            # Add parameters if present
-            if "parameters" in pattern and pattern["parameters"]:
-                pattern_entry["parameters"] = pattern["parameters"]
-            
-            update_data = {
-                "enabled": True,
-                "patterns": [pattern_entry]
-            }
-            
-            # Try up to 3 times
-            success = False
-            for attempt in range(1, 4):
-                if attempt > 1:
-                    print(f"Retry attempt {attempt} for pattern {pattern_id}...")
-                
-                result = make_api_request(base_url, method="PATCH", data=update_data)
-                if result:
-                    logger.info(f"Successfully added pattern {pattern_id}")
-                    success = True
-                    break
-                else:
-                    logger.warning(f"Failed to add pattern {pattern_id} (attempt {attempt})")
-                    time.sleep(3)
-            
-            if not success:
-                logger.error(f"Failed to add pattern {pattern_id} after all attempts")
-            
-            # Small delay between patterns
-            time.sleep(1)
+        if not missing_patterns:
+            # Only the tool itself needs enabling
+            if not make_api_request(base_url, method="PATCH", data={"enabled": True, "patterns": []}):
+                logger.error(f"Failed to enable tool {tool_name}")
+            continue
+        
+        if send_pattern_batches(base_url, tool_name, missing_patterns, batcher):
+            logger.info(f"Successfully fixed {len(missing_patterns)} patterns for {tool_name}")
+        else:
+            logger.error(f"Some patterns could not be fixed for {tool_name}")
 
 def verify_patterns_enabled(base_url: str, expected_pattern_ids: List[str]) -> bool:
     """Verify that all expected patterns are enabled."""
-    enabled_pattern_ids = set()
-    cursor = None
-    
-    while True:
-        params = {"cursor": cursor} if cursor else None
-        patterns_response = make_api_request(f"{base_url}/patterns", params=params)
-        
-        if not patterns_response or not patterns_response.get("data"):
-            break
-            
-        # Add enabled pattern IDs from this page
-        for pattern in patterns_response["data"]:
-            if pattern.get("enabled", False) and pattern.get("patternDefinition", {}).get("id"):
-                enabled_pattern_ids.add(pattern["patternDefinition"]["id"])
-        
-        # Check for more pages
-        pagination = patterns_response.get("pagination", {})
-        cursor = pagination.get("cursor")
-        if not cursor or cursor == "0":
-            break
-            
-        time.sleep(1)  # Rate limiting
+    enabled_pattern_ids = {
+        pattern["patternDefinition"]["id"]
+        for pattern in fetch_enabled_patterns(f"{base_url}/patterns")
+        if pattern.get("patternDefinition", {}).get("id")
+    }
     
     # Check if all expected patterns are enabled
     expected_set = set(expected_pattern_ids)
@@ -822,205 +1014,188 @@ def disable_default_cloud_tools(provider: str, cloud_org_name: str, standard_id:
             else:
                 logger.error(f"Failed to disable tool: {tool_name}")
                 print(f"Failed to disable tool: {tool_name}")
-            
-            time.sleep(1)
+
+def normalize_parameters(parameters: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Turn a pattern's list of {name, value} parameters into a dict."""
+    return {parameter.get("name"): parameter.get("value") for parameter in parameters or []}
+
+def parameters_satisfied(current: Dict[str, Any], desired: Dict[str, Any]) -> bool:
+    """Whether a pattern's current parameters already hold every desired value.
+
+    Parameters missing from `desired` are left alone by an update, so they don't count as a difference.
+    """
+    return all(current.get(name) == value for name, value in desired.items())
+
+def diff_tool_patterns(current: Dict[str, List[Dict[str, Any]]],
+                       desired: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Compute the pattern updates that turn the current enabled patterns into the desired ones.
+
+    Both arguments map pattern ids to their parameter lists. Patterns only in `current` are disabled,
+    patterns only in `desired` are enabled, and patterns whose desired parameters differ from the
+    current values are re-sent with their parameters. Unchanged patterns are left out.
+    """
+    changes = [{"id": pattern_id, "enabled": False} for pattern_id in sorted(current.keys() - desired.keys())]
+
+    for pattern_id in sorted(desired):
+        desired_parameters = normalize_parameters(desired[pattern_id])
+        if pattern_id in current and parameters_satisfied(normalize_parameters(current[pattern_id]), desired_parameters):
+            continue
+
+        pattern_entry = {
+            "id": pattern_id,
+            "enabled": True
+        }
+        # Add parameters if present
+        if desired[pattern_id]:
+            pattern_entry["parameters"] = desired[pattern_id]
+        changes.append(pattern_entry)
+
+    return changes
+
+def send_pattern_batches(base_url: str, tool_name: str, patterns: List[Dict[str, Any]],
+                         batcher: Optional[AdaptiveBatcher] = None) -> bool:
+    """PATCH pattern updates to a tool, enabling it, in batches sized by the adaptive batcher.
+
+    Returns False if any pattern could not be updated.
+    """
+    batcher = batcher or AdaptiveBatcher()
+    all_succeeded = True
+    i = 0
+    
+    while i < len(patterns):
+        batch = patterns[i:i+batcher.size]
+        print(f"Updating patterns {i+1}-{i+len(batch)} of {len(patterns)} (batch size {len(batch)})...")
+        
+        status = patch_tool_patterns(base_url, batch)
+        if status is not None and status < 400:
+            logger.info(f"Successfully updated {len(batch)} patterns for {tool_name}")
+            batcher.on_success(len(batch))
+            i += len(batch)
+        elif status == 413 and batcher.on_overload(len(batch)):
+            # The payload is too large: retry with a smaller batch
+            logger.info(f"Reducing batch size to {batcher.size} for {tool_name}")
+        elif status in FATAL_STATUSES:
+            # Credentials or the tool itself are wrong: every further request would fail too
+            remaining = len(patterns) - i
+            logger.error(f"Stopping updates for {tool_name} (status {status}), {remaining} patterns not updated")
+            print(f"Stopping updates for {tool_name}: {remaining} patterns not updated (status {status})")
+            return False
+        elif status in VALIDATION_STATUSES:
+            # The batch was rejected because of some of its patterns: isolate them
+            logger.warning(f"Failed to update {len(batch)} patterns for {tool_name} (status {status}), bisecting")
+            failed_ids, fatal_status = bisect_pattern_batch(base_url, tool_name, batch)
+            if failed_ids:
+                print(f"Failed to update {len(failed_ids)} patterns: {failed_ids[:10]}")
+                all_succeeded = False
+            if fatal_status is not None:
+                remaining = len(patterns) - i - len(batch)
+                logger.error(f"Stopping updates for {tool_name} (status {fatal_status}), {remaining} more patterns not updated")
+                print(f"Stopping updates for {tool_name}: {remaining} more patterns not updated (status {fatal_status})")
+                return False
+            i += len(batch)
+        else:
+            # 413 at the minimum batch size, or patch_tool_patterns already backed off and retried
+            logger.error(f"Failed to update {len(batch)} patterns for {tool_name} (status {status})")
+            print(f"Failed to update {len(batch)} patterns starting at {batch[0]['id']}")
+            all_succeeded = False
+            i += len(batch)
+    
+    return all_succeeded
+
+def bisect_pattern_batch(base_url: str, tool_name: str,
+                         batch: List[Dict[str, Any]]) -> Tuple[List[str], Optional[int]]:
+    """Resend a batch rejected with a validation error in halves until the failing patterns are isolated.
+
+    Returns their ids, and the status that stopped the bisection if the server answered with a
+    fatal status (401, 403, 404), in which case no more requests are sent.
+    """
+    if len(batch) == 1:
+        logger.error(f"Failed to update pattern {batch[0]['id']} for {tool_name}")
+        return [batch[0]["id"]], None
+    
+    failed_ids = []
+    middle = len(batch) // 2
+    halves = (batch[:middle], batch[middle:])
+    for index, half in enumerate(halves):
+        status = patch_tool_patterns(base_url, half)
+        if status is not None and status < 400:
+            continue
+        if status in FATAL_STATUSES:
+            # Neither this half nor the ones left were updated
+            for unsent in halves[index:]:
+                failed_ids.extend(pattern["id"] for pattern in unsent)
+            return failed_ids, status
+        if status in VALIDATION_STATUSES:
+            half_failed_ids, fatal_status = bisect_pattern_batch(base_url, tool_name, half)
+            failed_ids.extend(half_failed_ids)
+            if fatal_status is not None:
+                for unsent in halves[index + 1:]:
+                    failed_ids.extend(pattern["id"] for pattern in unsent)
+                return failed_ids, fatal_status
+        else:
+            # Not caused by the patterns themselves, so splitting further won't help
+            logger.error(f"Failed to update {len(half)} patterns for {tool_name} (status {status})")
+            failed_ids.extend(pattern["id"] for pattern in half)
+    return failed_ids, None
 
 def update_cloud_coding_standard(provider: str, cloud_org_name: str, standard_id: str, source_data: Dict[str, Any]) -> None:
-    """Update cloud coding standard with source configuration."""
+    """Update cloud coding standard with source configuration.
+
+    Only the differences between the tool's current patterns and the source patterns are sent.
+    """
     logger.info(f"Updating coding standard for {cloud_org_name}")
     
+    tools_url = f"{CLOUD_API_URL}/organizations/{provider}/{cloud_org_name}/coding-standards/{standard_id}/tools"
+    tools_response = make_api_request(tools_url)
+    enabled_tools = {
+        tool["uuid"] for tool in (tools_response or {}).get("data", []) if tool.get("isEnabled", False)
+    }
+    # Shared by all the tools, so the batch size learned on one tool carries over to the next
+    batcher = AdaptiveBatcher()
+    
     for cloud_tool_uuid, tool_data in source_data["tool_patterns"].items():
         cloud_tool_name = tool_data["name"]
         desired_patterns = tool_data["patterns"]
         logger.info(f"Processing tool: {cloud_tool_name} with {len(desired_patterns)} patterns")
         print(f"\nProcessing tool: {cloud_tool_name}")
         
-        base_url = f"{CLOUD_API_URL}/organizations/{provider}/{cloud_org_name}/coding-standards/{standard_id}/tools/{cloud_tool_uuid}"
+        base_url = f"{tools_url}/{cloud_tool_uuid}"
         
-        # Step 1: Enable the tool
-        print("Enabling tool...")
-        enable_data = {
-            "enabled": True,
-            "patterns": []
-        }
-        result = make_api_request(base_url, method="PATCH", data=enable_data)
-        if not result:
-            logger.error(f"Failed to enable tool {cloud_tool_name}")
-            print(f"Failed to enable tool {cloud_tool_name}")
-            continue
-        
-        time.sleep(1)  # Rate limiting
-        
-        # Step 2: Get all currently enabled patterns
+        # Step 1: Get all currently enabled patterns
         print("Getting current patterns...")
-        current_patterns = []
-        cursor = None
-        
-        while True:
-            params = {"cursor": cursor} if cursor else None
-            patterns_response = make_api_request(f"{base_url}/patterns", params=params)
-            
-            if not patterns_response or not patterns_response.get("data"):
-                break
-                
-            # Add patterns from this page
-            current_patterns.extend([
-                {"id": pattern["patternDefinition"]["id"], "enabled": False}
-                for pattern in patterns_response["data"]
-                if pattern.get("enabled", False)
-            ])
-            
-            # Check for more pages
-            pagination = patterns_response.get("pagination", {})
-            cursor = pagination.get("cursor")
-            if not cursor or cursor == "0":
-                break
-                
-            time.sleep(1)  # Rate limiting
-        
-        logger.info(f"Found {len(current_patterns)} currently enabled patterns for {cloud_tool_name}")
-        print(f"Found {len(current_patterns)} currently enabled patterns")
-        
-        
-        # Step 3: Disable all current patterns in smaller batches to avoid request size limits
-        if current_patterns:
-            print(f"Disabling all {len(current_patterns)} current patterns in batches...")
-            
-            # Use a smaller batch size for disabling to avoid request size limits
-            disable_batch_size = 50
-            disable_failed = False
-            
-            for i in range(0, len(current_patterns), disable_batch_size):
-                batch = current_patterns[i:i+disable_batch_size]
-                batch_num = i//disable_batch_size + 1
-                total_batches = (len(current_patterns) + disable_batch_size - 1)//disable_batch_size
-                print(f"Disabling batch {batch_num}/{total_batches} ({len(batch)} patterns)...")
-                
-                disable_data = {
-                    "enabled": True,
-                    "patterns": batch  # Batch of patterns with enabled: False
-                }
-                
-                # Try up to 3 times for each batch
-                success = False
-                for attempt in range(1, 4):
-                    if attempt > 1:
-                        print(f"Retry attempt {attempt} for disabling batch {batch_num}...")
-                    
-                    result = make_api_request(base_url, method="PATCH", data=disable_data)
-                    if result:
-                        logger.info(f"Successfully disabled {len(batch)} patterns (batch {batch_num})")
-                        print(f"Successfully disabled {len(batch)} patterns (batch {batch_num})")
-                        success = True
-                        break
-                    else:
-                        logger.warning(f"Failed to disable patterns (batch {batch_num}, attempt {attempt})")
-                        print(f"Failed to disable patterns (batch {batch_num}, attempt {attempt})")
-                        time.sleep(3)  # Wait between retries
-                
-                if not success:
-                    logger.error(f"Failed to disable patterns batch {batch_num} after all attempts")
-                    print(f"Failed to disable patterns batch {batch_num} after all attempts")
-                    disable_failed = True
-                    break  # Stop trying to disable more patterns if a batch fails
-                
-                time.sleep(2)  # Rate limiting between batches
-            
-            if disable_failed:
-                logger.error(f"Failed to disable all existing patterns for {cloud_tool_name}")
-                print(f"Failed to disable all existing patterns for {cloud_tool_name}")
-                continue
-                
-            time.sleep(3)  # Additional rate limiting before enabling patterns
+        current = {
+            pattern["patternDefinition"]["id"]: pattern.get("parameters", [])
+            for pattern in fetch_enabled_patterns(f"{base_url}/patterns")
+        }
+        logger.info(f"Found {len(current)} currently enabled patterns for {cloud_tool_name}")
+        print(f"Found {len(current)} currently enabled patterns")
         
-        # Step 4: Enable our desired patterns
-        print(f"Updating with {len(desired_patterns)} specific patterns...")
+        # Step 2: Compute what has to change to match the source
+        desired = {pattern["patternDefinition"]["id"]: pattern.get("parameters", []) for pattern in desired_patterns}
+        changes = diff_tool_patterns(current, desired)
         
-        # Log pattern IDs for debugging
-        pattern_ids = [p["patternDefinition"]["id"] for p in desired_patterns]
-        logger.debug(f"Pattern IDs to enable: {pattern_ids[:10]}")
-        if len(pattern_ids) > 10:
-            logger.debug(f"... and {len(pattern_ids) - 10} more")
+        if not changes:
+            if cloud_tool_uuid in enabled_tools:
+                print(f"{cloud_tool_name} is already up to date")
+                logger.info(f"{cloud_tool_name} is already up to date")
+            else:
+                print("Enabling tool...")
+                result = make_api_request(base_url, method="PATCH", data={"enabled": True, "patterns": []})
+                if not result:
+                    logger.error(f"Failed to enable tool {cloud_tool_name}")
+                    print(f"Failed to enable tool {cloud_tool_name}")
+            continue
         
-        # Prepare patterns for update
-        patterns_to_enable = []
-        for pattern in desired_patterns:
-            pattern_entry = {
-                "id": pattern["patternDefinition"]["id"],
-                "enabled": True
-            }
-            
-            # Add parameters if present
-            if "parameters" in pattern and pattern["parameters"]:
-                pattern_entry["parameters"] = pattern["parameters"]
-                
-            patterns_to_enable.append(pattern_entry)
+        to_disable = sum(1 for change in changes if not change["enabled"])
+        print(f"Sending {len(changes)} pattern changes ({len(changes) - to_disable} to enable or reconfigure, {to_disable} to disable)...")
+        logger.info(f"{cloud_tool_name}: {len(changes) - to_disable} patterns to enable or reconfigure, "
+                    f"{to_disable} to disable, {len(desired) - (len(changes) - to_disable)} unchanged")
         
-        # Update in batches to avoid request size limits
-        batch_size = 50  # Reduced batch size for better reliability
-        failed_batches = []
-        
-        for i in range(0, len(patterns_to_enable), batch_size):
-            batch = patterns_to_enable[i:i+batch_size]
-            batch_num = i//batch_size + 1
-            total_batches = (len(patterns_to_enable) + batch_size - 1)//batch_size
-            print(f"Updating batch {batch_num}/{total_batches}...")
-            
-            update_data = {
-                "enabled": True,
-                "patterns": batch
-            }
-            
-            # Try up to 3 times for each batch
-            success = False
-            for attempt in range(1, 4):
-                if attempt > 1:
-                    print(f"Retry attempt {attempt} for batch {batch_num}...")
-                
-                result = make_api_request(base_url, method="PATCH", data=update_data)
-                if result:
-                    logger.info(f"Successfully updated {len(batch)} patterns for {cloud_tool_name} (batch {batch_num})")
-                    print(f"Successfully updated {len(batch)} patterns (batch {batch_num})")
-                    success = True
-                    break
-                else:
-                    logger.warning(f"Failed to update patterns for {cloud_tool_name} (batch {batch_num}, attempt {attempt})")
-                    print(f"Failed to update patterns (batch {batch_num}, attempt {attempt})")
-                    time.sleep(5)  # Longer wait between retries
-            
-            if not success:
-                logger.error(f"All attempts failed for batch {batch_num}")
-                failed_batches.append((i, batch))
-            
-            time.sleep(3)  # Rate limiting between batches
-        
-        # Retry failed batches with even smaller batch size
-        if failed_batches:
-            print(f"\nRetrying {len(failed_batches)} failed batches with smaller batch size...")
-            smaller_batch_size = 10
-            
-            for batch_start, original_batch in failed_batches:
-                for j in range(0, len(original_batch), smaller_batch_size):
-                    mini_batch = original_batch[j:j+smaller_batch_size]
-                    mini_batch_num = f"{batch_start//batch_size + 1}.{j//smaller_batch_size + 1}"
-                    print(f"Retrying mini-batch {mini_batch_num}...")
-                    
-                    update_data = {
-                        "enabled": True,
-                        "patterns": mini_batch
-                    }
-                    
-                    result = make_api_request(base_url, method="PATCH", data=update_data)
-                    if result:
-                        logger.info(f"Successfully updated {len(mini_batch)} patterns in retry (mini-batch {mini_batch_num})")
-                        print(f"Successfully updated {len(mini_batch)} patterns in retry (mini-batch {mini_batch_num})")
-                    else:
-                        logger.error(f"Failed to update patterns in retry (mini-batch {mini_batch_num})")
-                        print(f"Failed to update patterns in retry (mini-batch {mini_batch_num})")
-                    
-                    time.sleep(3)  # Rate limiting
+        # Step 3: Send only the changes; every batch also enables the tool
+        send_pattern_batches(base_url, cloud_tool_name, changes, batcher)
         
         # Verify all patterns were enabled
+        pattern_ids = list(desired)
         print("Verifying pattern updates...")
         verification_success = verify_patterns_enabled(base_url, pattern_ids)
         if verification_success:
@@ -1033,55 +1208,341 @@ def update_cloud_coding_standard(provider: str, cloud_org_name: str, standard_id
         print(f"Completed processing for {cloud_tool_name}")
         logger.info(f"Completed processing for {cloud_tool_name}")
 
+def migrate_to_destination(provider: str, source_data: Dict[str, Any], dest_org: str,
+                           make_default: bool = False) -> bool:
+    """Migrate coding standard to one destination organization."""
+    print(f"\n{'='*80}\nMigrating to {dest_org}\n{'='*80}")
+    logger.info(f"Starting migration to {dest_org}")
+    
+    try:
+        # Step 1: Create new coding standard
+        new_standard = create_cloud_coding_standard(provider, dest_org, source_data)
+        if not new_standard:
+            logger.error(f"Failed to create coding standard for {dest_org}")
+            return False
+            
+        standard_id = new_standard["id"]
+        logger.info(f"Created coding standard with ID: {standard_id}")
+        
+        # Step 2: Disable default tools
+        disable_default_cloud_tools(provider, dest_org, standard_id)
+        
+        # Step 3: Update with source configuration
+        update_cloud_coding_standard(provider, dest_org, standard_id, source_data)
+        
+        # Step 4: Validate migration
+        validation_result = validate_migration(provider, dest_org, standard_id, source_data)
+        
+        # Step 5: Always promote the draft coding standard to an effective one
+        logger.info(f"Promoting coding standard for {dest_org}")
+        promote_result = promote_coding_standard(provider, dest_org, standard_id)
+        if not promote_result:
+            logger.warning(f"Failed to promote coding standard for {dest_org}")
+            print(f"Failed to promote coding standard for {dest_org}")
+        
+        # Step 6: Make it the default only when asked, once it validated and was promoted
+        if make_default:
+            if not validation_result or not promote_result:
+                logger.warning(f"Not making the coding standard the default for {dest_org}: migration incomplete")
+                print(f"Not making the coding standard the default for {dest_org}: migration incomplete")
+                return False
+            if not set_default_coding_standard(provider, dest_org, standard_id):
+                print(f"Failed to make the coding standard the default for {dest_org}")
+                return False
+        
+        return validation_result
+        
+    except Exception as e:
+        error_msg = f"An error occurred during migration to {dest_org}: {str(e)}"
+        logger.error(error_msg)
+        print(error_msg)
+        traceback.print_exc()
+        return False
+
 def migrate_to_destinations(provider: str, source_data: Dict[str, Any], dest_orgs: List[str], 
                           make_default: bool = False) -> Dict[str, bool]:
-    """Migrate coding standard to multiple destination organizations."""
-    results = {}
+    """Migrate coding standard to multiple destination organizations.
+
+    Destinations are migrated concurrently, one worker per organization, and all their
+    requests share the global rate limiter.
+    """
+    global spinners_enabled
+    if len(dest_orgs) <= 1 or max_workers <= 1:
+        return {dest_org: migrate_to_destination(provider, source_data, dest_org, make_default) for dest_org in dest_orgs}
     
-    for dest_org in dest_orgs:
-        print(f"\n{'='*80}\nMigrating to {dest_org}\n{'='*80}")
-        logger.info(f"Starting migration to {dest_org}")
+    def run(dest_org: str) -> bool:
+        # Name the worker after the organization so the log file shows which migration each line belongs to
+        threading.current_thread().name = dest_org
+        started = time.time()
+        result = migrate_to_destination(provider, source_data, dest_org, make_default)
+        logger.info(f"Migration to {dest_org} finished in {time.time() - started:.1f}s: {'success' if result else 'failed'}")
+        return result
+    
+    logger.info(f"Migrating to {len(dest_orgs)} organizations with up to {max_workers} workers")
+    # Concurrent spinners would garble the console
+    spinners_enabled = False
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(dest_orgs))) as executor:
+            return dict(zip(dest_orgs, executor.map(run, dest_orgs)))
+    finally:
+        spinners_enabled = True
+
+def to_import_format(source_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert extracted coding standard data to the format used by the import."""
+    if "tools" in source_data and "tool_patterns" not in source_data:
+        print("Converting from extract format to import format...")
+        logger.info("Converting from extract format to import format")
         
-        try:
-            # Step 1: Create new coding standard
-            new_standard = create_cloud_coding_standard(provider, dest_org, source_data)
-            if not new_standard:
-                logger.error(f"Failed to create coding standard for {dest_org}")
-                results[dest_org] = False
-                continue
-                
-            standard_id = new_standard["id"]
-            logger.info(f"Created coding standard with ID: {standard_id}")
-            
-            # Step 2: Disable default tools
-            disable_default_cloud_tools(provider, dest_org, standard_id)
-            
-            # Step 3: Update with source configuration
-            update_cloud_coding_standard(provider, dest_org, standard_id, source_data)
-            
-            # Step 4: Validate migration
-            validation_result = validate_migration(provider, dest_org, standard_id, source_data)
-            
-            # Step 5: Always promote the draft coding standard to an effective one
-            # Note: The promotion API also makes it the default if it was marked as default
-            # So we only promote if make_default is true OR we're not making it default
-            # This ensures we don't accidentally make a non-default standard the default
-            logger.info(f"Promoting coding standard for {dest_org}")
-            promote_result = promote_coding_standard(provider, dest_org, standard_id)
-            if not promote_result:
-                logger.warning(f"Failed to promote coding standard for {dest_org}")
-                print(f"Failed to promote coding standard for {dest_org}")
-            
-            results[dest_org] = validation_result
+        tool_patterns = {}
+        for tool in source_data["tools"]:
+            tool_uuid = tool["uuid"]
+            tool_name = tool["name"]
+            patterns = tool.get("patterns", [])
             
-        except Exception as e:
-            error_msg = f"An error occurred during migration to {dest_org}: {str(e)}"
-            logger.error(error_msg)
-            print(error_msg)
-            traceback.print_exc()
-            results[dest_org] = False
+            if patterns:
+                tool_patterns[tool_uuid] = {
+                    "name": tool_name,
+                    "patterns": patterns
+                }
+        
+        source_data["tool_patterns"] = tool_patterns
+    return source_data
+
+# Snapshots are JSON Lines files (gzip-compressed when the name ends in .gz): a header line with the
+# coding standard, then one line per tool and one per enabled pattern with only its id and parameters
+SNAPSHOT_VERSION = 1
+SNAPSHOT_EXTENSIONS = (".jsonl", ".jsonl.gz")
+
+def is_snapshot_file(path: str) -> bool:
+    """Whether the path names a compact snapshot rather than a full JSON extract."""
+    return path.endswith(SNAPSHOT_EXTENSIONS)
+
+def open_snapshot(path: str, mode: str, compressed: Optional[bool] = None):
+    """Open a snapshot file for text reading ('r') or writing ('w'), compressed by default if it ends in .gz."""
+    if compressed is None:
+        compressed = path.endswith(".gz")
+    if compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+class SnapshotWriter:
+    """Streams a coding standard to a snapshot file, one tool at a time.
     
-    return results
+    The file is written under a temporary name and only replaces `path` once complete.
+    """
+
+    def __init__(self, path: str, coding_standard: Dict[str, Any]):
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        self.file = open_snapshot(self.temp_path, "w", compressed=path.endswith(".gz"))
+        self.write_record({"snapshot": SNAPSHOT_VERSION, "coding_standard": coding_standard})
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(record, separators=(",", ":")))
+        self.file.write("\n")
+
+    def write_tool(self, tool_uuid: str, tool_name: str, patterns: List[Dict[str, Any]]) -> None:
+        """Write a tool and its enabled patterns, keeping only pattern ids and parameters."""
+        self.write_record({"tool": tool_uuid, "name": tool_name})
+        for pattern in patterns:
+            record = {"tool": tool_uuid, "pattern": pattern["patternDefinition"]["id"]}
+            parameters = normalize_parameters(pattern.get("parameters"))
+            if parameters:
+                record["parameters"] = parameters
+            self.write_record(record)
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.file.close()
+        if exc_type is None:
+            os.replace(self.temp_path, self.path)
+        else:
+            os.remove(self.temp_path)
+
+def write_snapshot(path: str, coding_standard: Dict[str, Any], tools) -> None:
+    """Write a snapshot from (tool uuid, tool name, patterns) tuples."""
+    with SnapshotWriter(path, coding_standard) as writer:
+        for tool_uuid, tool_name, patterns in tools:
+            writer.write_tool(tool_uuid, tool_name, patterns)
+
+def iter_snapshot(path: str):
+    """Yield the coding standard of a snapshot, then its tool and pattern records as they are read."""
+    with open_snapshot(path, "r") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("snapshot") != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} coding standard snapshot")
+        yield header["coding_standard"]
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def load_snapshot(path: str) -> Dict[str, Any]:
+    """Load a snapshot in the format used by the import."""
+    records = iter_snapshot(path)
+    source_data = {"coding_standard": next(records), "tool_patterns": {}}
+    tool_patterns = source_data["tool_patterns"]
+    for record in records:
+        if "pattern" not in record:
+            tool_patterns[record["tool"]] = {"name": record["name"], "patterns": []}
+            continue
+        tool_patterns[record["tool"]]["patterns"].append({
+            "patternDefinition": {"id": record["pattern"]},
+            "enabled": True,
+            "parameters": parameter_list(record.get("parameters", {}))
+        })
+    return source_data
+
+def parameter_list(parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn a dict of parameters back into the API's list of {name, value}."""
+    return [{"name": name, "value": value} for name, value in parameters.items()]
+
+def index_coding_standard(path: str) -> Dict[str, Any]:
+    """Index a snapshot or full extract by tool and pattern.
+    
+    Returns {"coding_standard": ..., "tools": {tool uuid: name}, "patterns": {tool uuid: {pattern id: parameters}}},
+    with parameters as a dict. Snapshots are indexed as they are streamed.
+    """
+    if is_snapshot_file(path):
+        records = iter_snapshot(path)
+        index = {"coding_standard": next(records), "tools": {}, "patterns": {}}
+        for record in records:
+            if "pattern" in record:
+                index["patterns"][record["tool"]][record["pattern"]] = record.get("parameters", {})
+            else:
+                index["tools"][record["tool"]] = record["name"]
+                index["patterns"][record["tool"]] = {}
+        return index
+    
+    source_data = load_source_data(path)
+    return {
+        "coding_standard": source_data.get("coding_standard", {}),
+        "tools": {tool_uuid: tool_data["name"] for tool_uuid, tool_data in source_data["tool_patterns"].items()},
+        "patterns": {
+            tool_uuid: {
+                pattern["patternDefinition"]["id"]: normalize_parameters(pattern.get("parameters"))
+                for pattern in tool_data["patterns"]
+            }
+            for tool_uuid, tool_data in source_data["tool_patterns"].items()
+        }
+    }
+
+def diff_coding_standards(base: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare two indexed coding standards, looking up every pattern once in each index.
+
+    Parameters are compared like diff_tool_patterns does, so "changed" lists exactly the patterns a patch re-sends.
+    """
+    report = {"tools_added": [], "tools_removed": [], "added": [], "removed": [], "changed": []}
+    for tool_uuid in sorted(base["tools"].keys() | target["tools"].keys()):
+        tool_name = target["tools"].get(tool_uuid) or base["tools"][tool_uuid]
+        if tool_uuid not in target["tools"]:
+            report["tools_removed"].append({"tool": tool_uuid, "tool_name": tool_name})
+        elif tool_uuid not in base["tools"]:
+            report["tools_added"].append({"tool": tool_uuid, "tool_name": tool_name})
+        
+        base_patterns = base["patterns"].get(tool_uuid, {})
+        target_patterns = target["patterns"].get(tool_uuid, {})
+        for pattern_id, parameters in target_patterns.items():
+            if pattern_id not in base_patterns:
+                report["added"].append({"tool": tool_uuid, "tool_name": tool_name,
+                                        "pattern": pattern_id, "parameters": parameters})
+            elif not parameters_satisfied(base_patterns[pattern_id], parameters):
+                report["changed"].append({"tool": tool_uuid, "tool_name": tool_name, "pattern": pattern_id,
+                                          "from": base_patterns[pattern_id], "to": parameters})
+        for pattern_id in base_patterns:
+            if pattern_id not in target_patterns:
+                report["removed"].append({"tool": tool_uuid, "tool_name": tool_name,
+                                          "pattern": pattern_id, "parameters": base_patterns[pattern_id]})
+    return report
+
+def build_coding_standard_patch(base: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the minimal set of tool updates that turns a coding standard matching base into target.
+    
+    Tools missing from target are disabled; other tools get only the pattern changes from
+    diff_tool_patterns and are left out when nothing changed.
+    """
+    patch = {"patch": SNAPSHOT_VERSION, "coding_standard": target["coding_standard"], "tools": {}}
+    for tool_uuid in sorted(base["tools"].keys() | target["tools"].keys()):
+        if tool_uuid not in target["tools"]:
+            patch["tools"][tool_uuid] = {"name": base["tools"][tool_uuid], "enabled": False, "patterns": []}
+            continue
+        
+        current = {pattern_id: parameter_list(parameters)
+                   for pattern_id, parameters in base["patterns"].get(tool_uuid, {}).items()}
+        desired = {pattern_id: parameter_list(parameters)
+                   for pattern_id, parameters in target["patterns"][tool_uuid].items()}
+        changes = diff_tool_patterns(current, desired)
+        if changes or tool_uuid not in base["tools"]:
+            patch["tools"][tool_uuid] = {"name": target["tools"][tool_uuid], "enabled": True, "patterns": changes}
+    return patch
+
+def print_coding_standard_diff(base_file: str, target_file: str, report: Dict[str, Any]) -> None:
+    """Print the differences between two coding standards, per tool."""
+    print(f"\n{base_file} -> {target_file}")
+    print("=" * 80)
+    for tool in report["tools_added"]:
+        print(f"+ tool {tool['tool_name']}")
+    for tool in report["tools_removed"]:
+        print(f"- tool {tool['tool_name']}")
+    
+    per_tool = {}
+    for change in ("added", "removed", "changed"):
+        for entry in report[change]:
+            per_tool.setdefault(entry["tool_name"], {"added": 0, "removed": 0, "changed": 0})[change] += 1
+    for tool_name, counts in sorted(per_tool.items()):
+        print(f"{tool_name}: {counts['added']} added, {counts['removed']} removed, {counts['changed']} with changed parameters")
+    
+    if not per_tool and not report["tools_added"] and not report["tools_removed"]:
+        print("No differences")
+
+def apply_coding_standard_patch(provider: str, org_name: str, standard_selector: str,
+                                patch: Dict[str, Any], promote: bool = False) -> bool:
+    """Apply a patch built by build_coding_standard_patch to a coding standard of a Cloud organization."""
+    print(f"\nApplying patch to {org_name}")
+    logger.info(f"Applying patch with {len(patch['tools'])} tool updates to {org_name}")
+    
+    try:
+        standards = get_coding_standards(org_name, provider, include_drafts=True)
+        standard = find_coding_standard(standards, standard_selector)
+    except Exception as e:
+        error_msg = f"Failed to find coding standard {standard_selector} in {org_name}: {str(e)}"
+        logger.error(error_msg)
+        print(error_msg)
+        return False
+    
+    tools_url = f"{CLOUD_API_URL}/organizations/{provider}/{org_name}/coding-standards/{standard['id']}/tools"
+    batcher = AdaptiveBatcher()
+    all_succeeded = True
+    for tool_uuid, tool_patch in patch["tools"].items():
+        base_url = f"{tools_url}/{tool_uuid}"
+        tool_name = tool_patch["name"]
+        if not tool_patch["enabled"]:
+            print(f"Disabling {tool_name}")
+            succeeded = make_api_request(base_url, method="PATCH", data={"enabled": False, "patterns": []}) is not None
+        elif tool_patch["patterns"]:
+            print(f"Sending {len(tool_patch['patterns'])} pattern changes to {tool_name}")
+            succeeded = send_pattern_batches(base_url, tool_name, tool_patch["patterns"], batcher)
+        else:
+            print(f"Enabling {tool_name}")
+            status = patch_tool_patterns(base_url, [])
+            succeeded = status is not None and status < 400
+        
+        if not succeeded:
+            logger.error(f"Failed to apply patch to {tool_name} in {org_name}")
+            print(f"✗ Failed to apply patch to {tool_name}")
+            all_succeeded = False
+    
+    if promote and all_succeeded:
+        all_succeeded = promote_coding_standard(provider, org_name, standard["id"])
+    return all_succeeded
+
+def load_source_data(input_file: str) -> Dict[str, Any]:
+    """Load an extracted coding standard or a snapshot from a file, ready to be imported."""
+    if is_snapshot_file(input_file):
+        return load_snapshot(input_file)
+    with open(input_file, 'r') as f:
+        return to_import_format(json.load(f))
 
 def import_coding_standard(input_file: str, provider: str, dest_orgs: List[str], 
                          make_default: bool = False) -> Dict[str, bool]:
@@ -1090,27 +1551,7 @@ def import_coding_standard(input_file: str, provider: str, dest_orgs: List[str],
     logger.info(f"Importing coding standard from file: {input_file}")
     
     try:
-        with open(input_file, 'r') as f:
-            source_data = json.load(f)
-        
-        # Convert from extract format to import format if needed
-        if "tools" in source_data and "tool_patterns" not in source_data:
-            print("Converting from extract format to import format...")
-            logger.info("Converting from extract format to import format")
-            
-            tool_patterns = {}
-            for tool in source_data["tools"]:
-                tool_uuid = tool["uuid"]
-                tool_name = tool["name"]
-                patterns = tool.get("patterns", [])
-                
-                if patterns:
-                    tool_patterns[tool_uuid] = {
-                        "name": tool_name,
-                        "patterns": patterns
-                    }
-            
-            source_data["tool_patterns"] = tool_patterns
+        source_data = load_source_data(input_file)
         
         # Migrate to destinations
         return migrate_to_destinations(provider, source_data, dest_orgs, make_default)
@@ -1122,12 +1563,147 @@ def import_coding_standard(input_file: str, provider: str, dest_orgs: List[str],
         traceback.print_exc()
         return {dest_org: False for dest_org in dest_orgs}
 
+def load_migration_plan(plan_file: str, default_provider: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load and validate a migration plan file.
+    
+    The plan is a JSON object with an optional top-level "provider" and a "migrations" list.
+    Each migration reads its source either from an extracted file ("input") or from an
+    organization ("source_org", "standard" name or ID, optional "self_hosted" and "output"),
+    and is imported into "dest_orgs" (list or comma-separated string).
+    """
+    with open(plan_file, 'r') as f:
+        plan = json.load(f)
+    
+    plan_provider = plan.get("provider", default_provider)
+    migrations = []
+    errors = []
+    for idx, entry in enumerate(plan.get("migrations", []), 1):
+        name = entry.get("name") or f"migration-{idx}"
+        dest_orgs = entry.get("dest_orgs", [])
+        if isinstance(dest_orgs, str):
+            dest_orgs = dest_orgs.split(",")
+        migration = {
+            "name": name,
+            "provider": entry.get("provider", plan_provider),
+            "input": entry.get("input"),
+            "source_org": entry.get("source_org"),
+            "standard": entry.get("standard"),
+            "self_hosted": entry.get("self_hosted", False),
+            "output": entry.get("output"),
+            "dest_orgs": [org.strip() for org in dest_orgs if org.strip()],
+            "make_default": entry.get("make_default", False)
+        }
+        
+        if not migration["provider"]:
+            errors.append(f"{name}: no provider set for the migration or the plan")
+        if migration["input"] and migration["source_org"]:
+            errors.append(f"{name}: set either 'input' or 'source_org', not both")
+        elif not migration["input"] and not (migration["source_org"] and migration["standard"]):
+            errors.append(f"{name}: needs an 'input' file or a 'source_org' and 'standard'")
+        if migration["self_hosted"] and not SELF_HOSTED_API_TOKEN:
+            errors.append(f"{name}: SELF_HOSTED_API_TOKEN environment variable is not set")
+        if not migration["dest_orgs"]:
+            errors.append(f"{name}: no destination organizations")
+        if any(other["name"] == name for other in migrations):
+            errors.append(f"{name}: duplicate migration name")
+        migrations.append(migration)
+    
+    if not migrations:
+        errors.append("the plan has no migrations")
+    if errors:
+        raise ValueError("Invalid migration plan:\n  " + "\n  ".join(errors))
+    return migrations
+
+def prepare_plan_source(migration: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Load or extract the source coding standard of a plan migration."""
+    threading.current_thread().name = migration["name"]
+    try:
+        if migration["input"]:
+            logger.info(f"Loading source coding standard from {migration['input']}")
+            return load_source_data(migration["input"])
+        
+        source_data = extract_coding_standard(migration["provider"], migration["source_org"],
+                                              migration["self_hosted"], migration["output"],
+                                              migration["standard"])
+        return to_import_format(source_data) if source_data else None
+    except Exception as e:
+        error_msg = f"Failed to prepare the source of {migration['name']}: {str(e)}"
+        logger.error(error_msg)
+        print(error_msg)
+        return None
+
+def run_plan(migrations: List[Dict[str, Any]]) -> Dict[str, Dict[str, bool]]:
+    """Run all the migrations of a plan without prompting.
+    
+    Sources are loaded or extracted concurrently and each destination organization starts
+    migrating as soon as its source is ready. All work shares the --max-workers pool size
+    and the global rate limiter.
+    """
+    global spinners_enabled
+    results = {migration["name"]: {dest_org: False for dest_org in migration["dest_orgs"]}
+               for migration in migrations}
+    
+    def migrate(migration: Dict[str, Any], source_data: Dict[str, Any], dest_org: str) -> bool:
+        threading.current_thread().name = f"{migration['name']}/{dest_org}"
+        started = time.time()
+        result = migrate_to_destination(migration["provider"], source_data, dest_org, migration["make_default"])
+        logger.info(f"Migration to {dest_org} finished in {time.time() - started:.1f}s: {'success' if result else 'failed'}")
+        return result
+    
+    total_destinations = sum(len(migration["dest_orgs"]) for migration in migrations)
+    logger.info(f"Running {len(migrations)} planned migrations to {total_destinations} organizations "
+                f"with up to {max_workers} workers")
+    # Concurrent spinners would garble the console
+    spinners_enabled = False
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(migrations)))) as source_executor, \
+             ThreadPoolExecutor(max_workers=max(1, min(max_workers, total_destinations))) as migrate_executor:
+            source_futures = {source_executor.submit(prepare_plan_source, migration): migration
+                              for migration in migrations}
+            migrate_futures = {}
+            for future in as_completed(source_futures):
+                migration = source_futures[future]
+                source_data = future.result()
+                if not source_data:
+                    logger.error(f"Skipping {migration['name']}: source coding standard unavailable")
+                    continue
+                for dest_org in migration["dest_orgs"]:
+                    migrate_futures[migrate_executor.submit(migrate, migration, source_data, dest_org)] = \
+                        (migration["name"], dest_org)
+            
+            for future, (name, dest_org) in migrate_futures.items():
+                results[name][dest_org] = future.result()
+    finally:
+        spinners_enabled = True
+    return results
+
+def print_import_summary(results: Dict[str, bool]) -> None:
+    """Print the import result of each destination organization."""
+    print("\nImport Summary:")
+    print("=" * 80)
+    for org, success in results.items():
+        status = "✓ Success" if success else "✗ Failed"
+        print(f"{status}: {org}")
+    
+    success_count = sum(1 for success in results.values() if success)
+    print(f"\nSuccessfully imported to {success_count} out of {len(results)} organizations.")
+
 def main():
     """Main function to run the script."""
     parser = argparse.ArgumentParser(description="Codacy Coding Standard Extractor and Importer")
     
     # Common arguments
     parser.add_argument("--provider", help="Provider (e.g., gh, bb, gl)", default=None)
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"Maximum number of concurrent workers (default: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument("--requests-per-second", type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help=f"Maximum API requests per second across all workers (default: {DEFAULT_REQUESTS_PER_SECOND})")
+    parser.add_argument("--debug-sample-every", type=int, default=DEFAULT_DEBUG_SAMPLE_EVERY,
+                        help=f"Log request and response bodies for one API request in every N (default: {DEFAULT_DEBUG_SAMPLE_EVERY}, 0 to never log them)")
+    parser.add_argument("--tool-cache", default=TOOL_CATALOG_CACHE_FILE,
+                        help=f"File caching the tool catalogs of both environments (default: {TOOL_CATALOG_CACHE_FILE})")
+    parser.add_argument("--tool-cache-max-age", type=float, default=TOOL_CATALOG_MAX_AGE,
+                        help=f"Seconds a cached tool catalog is reused before being fetched again (default: {TOOL_CATALOG_MAX_AGE}, 0 to always refetch)")
     
     # Create subparsers for extract and import commands
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
@@ -1136,15 +1712,82 @@ def main():
     extract_parser = subparsers.add_parser("extract", help="Extract coding standard")
     extract_parser.add_argument("--org", help="Organization name", required=True)
     extract_parser.add_argument("--self-hosted", action="store_true", help="Extract from self-hosted Codacy")
-    extract_parser.add_argument("--output", help="Output file path", default="coding_standard.json")
+    extract_parser.add_argument("--output", help="Output file path; a .jsonl or .jsonl.gz name writes a compact snapshot", default="coding_standard.json")
+    extract_parser.add_argument("--standard", help="Name or ID of the coding standard to extract (prompts when omitted)", default=None)
     
     # Import command
     import_parser = subparsers.add_parser("import", help="Import coding standard")
-    import_parser.add_argument("--input", help="Input file path", required=True)
+    import_parser.add_argument("--input", help="Input file path (full extract or snapshot)", required=True)
     import_parser.add_argument("--dest-orgs", help="Destination organizations (comma-separated)", required=True)
     import_parser.add_argument("--make-default", action="store_true", help="Make the coding standard default")
     
+    # Convert command
+    convert_parser = subparsers.add_parser("convert", help="Convert an extracted coding standard to a compact snapshot")
+    convert_parser.add_argument("--input", help="Extracted coding standard file path", required=True)
+    convert_parser.add_argument("--output", help="Snapshot file path (.jsonl or .jsonl.gz)", required=True)
+    
+    # Diff command
+    diff_parser = subparsers.add_parser("diff", help="Compare a coding standard file with one or more others")
+    diff_parser.add_argument("files", nargs="+", help="Extracted coding standards or snapshots; the first is compared with each of the others")
+    diff_parser.add_argument("--report", help="Write the differences to this JSON file", default=None)
+    diff_parser.add_argument("--patch", help="Write a patch turning the first coding standard into the second to this JSON file", default=None)
+    
+    # Apply-patch command
+    apply_parser = subparsers.add_parser("apply-patch", help="Apply a patch created by diff to an existing coding standard")
+    apply_parser.add_argument("--patch", help="Patch file path", required=True)
+    apply_parser.add_argument("--org", help="Cloud organization name", required=True)
+    apply_parser.add_argument("--standard", help="Name or ID of the coding standard to update", required=True)
+    apply_parser.add_argument("--promote", action="store_true", help="Promote the coding standard once the patch is applied")
+    
+    # Run-plan command
+    plan_parser = subparsers.add_parser("run-plan", help="Run the migrations listed in a plan file without prompting")
+    plan_parser.add_argument("--plan", help="Migration plan file path", required=True)
+    plan_parser.add_argument("--results", help="Write the result of every migration to this JSON file", default=None)
+    
     args = parser.parse_args()
+    configure_concurrency(args.max_workers, args.requests_per_second)
+    configure_tool_catalog_cache(args.tool_cache, args.tool_cache_max_age)
+    configure_debug_sampling(args.debug_sample_every)
+    
+    # Converting works offline, no token needed
+    if args.command == "convert":
+        if not is_snapshot_file(args.output):
+            print(f"Error: snapshot file names must end in {' or '.join(SNAPSHOT_EXTENSIONS)}")
+            return 1
+        source_data = load_source_data(args.input)
+        write_snapshot(args.output, source_data["coding_standard"],
+                       ((tool_uuid, tool_data["name"], tool_data["patterns"])
+                        for tool_uuid, tool_data in source_data["tool_patterns"].items()))
+        print(f"Snapshot of {len(source_data['tool_patterns'])} tools saved to {args.output}")
+        return 0
+    
+    # Diffing works offline too
+    if args.command == "diff":
+        if len(args.files) < 2:
+            print("Error: diff needs at least two files")
+            return 1
+        if args.patch and len(args.files) != 2:
+            print("Error: --patch needs exactly two files")
+            return 1
+        
+        base = index_coding_standard(args.files[0])
+        reports = []
+        for target_file in args.files[1:]:
+            target = index_coding_standard(target_file)
+            report = diff_coding_standards(base, target)
+            print_coding_standard_diff(args.files[0], target_file, report)
+            reports.append({"base": args.files[0], "target": target_file, **report})
+            if args.patch:
+                patch = build_coding_standard_patch(base, target)
+                with open(args.patch, 'w') as f:
+                    json.dump(patch, f, indent=2)
+                print(f"\nPatch with updates for {len(patch['tools'])} tools saved to {args.patch}")
+        
+        if args.report:
+            with open(args.report, 'w') as f:
+                json.dump(reports, f, indent=2)
+            print(f"\nDifferences saved to {args.report}")
+        return 0
     
     # Check for required environment variables
     if args.command == "extract" and args.self_hosted and not SELF_HOSTED_API_TOKEN:
@@ -1157,31 +1800,50 @@ def main():
         logger.error("CLOUD_API_TOKEN environment variable is not set")
         return 1
     
+    if args.command == "run-plan":
+        try:
+            migrations = load_migration_plan(args.plan, args.provider)
+        except (OSError, ValueError) as e:
+            print(f"Error: {str(e)}")
+            logger.error(str(e))
+            return 1
+        
+        results = run_plan(migrations)
+        for name, migration_results in results.items():
+            print(f"\n{name}")
+            print_import_summary(migration_results)
+        
+        if args.results:
+            with open(args.results, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\nResults saved to {args.results}")
+        return 0 if all(all(r.values()) for r in results.values()) else 1
+    
     # Get provider if not provided
     provider = args.provider
     if not provider:
         provider = get_user_input("Enter provider (e.g., gh, bb, gl): ")
     
     # Execute command
+    if args.command == "apply-patch":
+        with open(args.patch, 'r') as f:
+            patch = json.load(f)
+        if apply_coding_standard_patch(provider, args.org, args.standard, patch, args.promote):
+            print(f"\nPatch applied to {args.org}")
+            return 0
+        print(f"\nPatch could not be fully applied to {args.org}")
+        return 1
+    
     if args.command == "extract":
         # Extract coding standard
-        extract_coding_standard(provider, args.org, args.self_hosted, args.output)
+        extract_coding_standard(provider, args.org, args.self_hosted, args.output, args.standard)
         print(f"\nExtraction completed. Coding standard saved to {args.output}")
         
     elif args.command == "import":
         # Import coding standard
         dest_orgs = [org.strip() for org in args.dest_orgs.split(",")]
         results = import_coding_standard(args.input, provider, dest_orgs, args.make_default)
-        
-        # Print summary
-        print("\nImport Summary:")
-        print("=" * 80)
-        for org, success in results.items():
-            status = "✓ Success" if success else "✗ Failed"
-            print(f"{status}: {org}")
-        
-        success_count = sum(1 for success in results.values() if success)
-        print(f"\nSuccessfully imported to {success_count} out of {len(results)} organizations.")
+        print_import_summary(results)
         
     else:
         # Interactive mode
@@ -1240,16 +1902,7 @@ def main():
             
             # Import coding standard
             results = import_coding_standard(input_file, provider, dest_orgs, make_default)
-            
-            # Print summary
-            print("\nImport Summary:")
-            print("=" * 80)
-            for org, success in results.items():
-                status = "✓ Success" if success else "✗ Failed"
-                print(f"{status}: {org}")
-            
-            success_count = sum(1 for success in results.values() if success)
-            print(f"\nSuccessfully imported to {success_count} out of {len(results)} organizations.")
+            print_import_summary(results)
     
     return 0
 
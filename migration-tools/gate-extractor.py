@@ -2,11 +2,25 @@ import argparse
 import os
 import requests
 import json
-from typing import List, Dict
+import math
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from typing import Iterator, List, Dict
 from urllib.parse import urljoin, quote
 from tqdm import tqdm
 
 CLOUD_API_URL = "https://app.codacy.com"
+SETTINGS_TYPES = ['repository', 'commits', 'pull-requests']
+DEFAULT_MAX_WORKERS = 4
+# none: no check, trust-put: compare the PUT response, sampled: trust-put plus reading back a sample, full: read back everything
+VERIFY_POLICIES = ['none', 'trust-put', 'sampled', 'full']
+DEFAULT_SAMPLE_RATE = 0.1
+PAGE_LIMIT = 100
+
+# Caps the API requests in flight across all threads, set from --max-workers
+request_slots = threading.BoundedSemaphore(DEFAULT_MAX_WORKERS)
 
 def get_env_variable(var_name: str) -> str:
     value = os.getenv(var_name)
@@ -14,17 +28,28 @@ def get_env_variable(var_name: str) -> str:
         raise ValueError(f"{var_name} environment variable is not set")
     return value
 
-def get_repositories(api_url: str, api_token: str, provider: str, organization: str) -> List[Dict]:
+def iter_repository_pages(api_url: str, api_token: str, provider: str, organization: str) -> Iterator[List[Dict]]:
     url = urljoin(api_url, f"api/v3/organizations/{quote(provider)}/{quote(organization)}/repositories")
     headers = {"Accept": "application/json", "api-token": api_token}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json().get('data', [])
+    cursor = None
+    while True:
+        params = {"limit": PAGE_LIMIT}
+        if cursor:
+            params["cursor"] = cursor
+        with request_slots:
+            response = requests.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        body = response.json()
+        yield body.get('data', [])
+        cursor = body.get('pagination', {}).get('cursor')
+        if not cursor:
+            break
 
 def get_quality_settings(api_url: str, api_token: str, provider: str, organization: str, repository: str, settings_type: str) -> Dict:
     url = urljoin(api_url, f"api/v3/organizations/{quote(provider)}/{quote(organization)}/repositories/{quote(repository)}/settings/quality/{settings_type}")
     headers = {"Accept": "application/json", "api-token": api_token}
-    response = requests.get(url, headers=headers)
+    with request_slots:
+        response = requests.get(url, headers=headers)
     response.raise_for_status()
     return response.json().get('data', {})
 
@@ -35,73 +60,181 @@ def update_cloud_quality_settings(api_token: str, provider: str, organization: s
         "Accept": "application/json",
         "api-token": api_token
     }
-    response = requests.put(url, headers=headers, json=settings)
+    with request_slots:
+        response = requests.put(url, headers=headers, json=settings)
     response.raise_for_status()
     return response.json()
 
+def settings_match(expected: Dict, actual: Dict) -> bool:
+    # The PUT response wraps the stored settings in "data", the GET response is already unwrapped
+    if isinstance(actual, dict) and isinstance(actual.get('data'), dict):
+        actual = actual['data']
+    return isinstance(actual, dict) and all(actual.get(key) == value for key, value in expected.items())
+
+def migrate_repository(self_hosted_api_url: str, self_hosted_api_token: str, cloud_api_token: str, provider: str, organization: str, cloud_organization: str, repo_name: str, verify_policy: str, sync: bool = False) -> Dict:
+    repo_results = {}
+
+    if sync:
+        # Read every settings type of both sides at once, to only update the ones that differ;
+        # request_slots keeps the requests of all the repositories within --max-workers
+        with ThreadPoolExecutor(max_workers=len(SETTINGS_TYPES) * 2) as executor:
+            self_hosted_futures = {settings_type: executor.submit(get_quality_settings, self_hosted_api_url, self_hosted_api_token, provider, organization, repo_name, settings_type) for settings_type in SETTINGS_TYPES}
+            cloud_futures = {settings_type: executor.submit(get_quality_settings, CLOUD_API_URL, cloud_api_token, provider, cloud_organization, repo_name, settings_type) for settings_type in SETTINGS_TYPES}
+
+    for settings_type in SETTINGS_TYPES:
+        try:
+            if sync:
+                self_hosted_settings = self_hosted_futures[settings_type].result()
+                if settings_match(self_hosted_settings, cloud_futures[settings_type].result()):
+                    repo_results[settings_type] = {
+                        "status": "unchanged",
+                        "self_hosted_settings": self_hosted_settings,
+                        # Compared with the cloud settings before any update, not read back after one
+                        "verification": "in-sync"
+                    }
+                    continue
+            else:
+                # Get settings from self-hosted
+                self_hosted_settings = get_quality_settings(self_hosted_api_url, self_hosted_api_token, provider, organization, repo_name, settings_type)
+            
+            # Update settings in cloud
+            cloud_update_result = update_cloud_quality_settings(cloud_api_token, provider, cloud_organization, repo_name, self_hosted_settings, settings_type)
+            
+            repo_results[settings_type] = {
+                "status": "success",
+                "self_hosted_settings": self_hosted_settings,
+                "cloud_update_result": cloud_update_result,
+                "verification": "skipped"
+            }
+
+            # Reading the settings back, if needed, is deferred until every repository is migrated
+            if verify_policy in ['trust-put', 'sampled']:
+                if settings_match(self_hosted_settings, cloud_update_result):
+                    repo_results[settings_type]["verification"] = "trusted"
+                else:
+                    repo_results[settings_type]["verification"] = "mismatch"
+                    repo_results[settings_type]["status"] = "verification_failed"
+        except requests.exceptions.RequestException as e:
+            repo_results[settings_type] = {
+                "status": "error",
+                "error_message": str(e)
+            }
+
+    return repo_results
+
+def select_settings_to_verify(candidates: List, verify_policy: str, sample_rate: float) -> List:
+    if verify_policy == 'full':
+        return candidates
+    if verify_policy == 'sampled' and candidates:
+        return random.sample(candidates, min(len(candidates), max(1, math.ceil(len(candidates) * sample_rate))))
+    return []
+
+def verify_setting(cloud_api_token: str, provider: str, cloud_organization: str, repo_name: str, settings_type: str, result: Dict) -> None:
+    try:
+        verified_settings = get_quality_settings(CLOUD_API_URL, cloud_api_token, provider, cloud_organization, repo_name, settings_type)
+        result["verified_cloud_settings"] = verified_settings
+        if settings_match(result["self_hosted_settings"], verified_settings):
+            result["verification"] = "verified"
+        else:
+            result["verification"] = "mismatch"
+            result["status"] = "verification_failed"
+    except requests.exceptions.RequestException as e:
+        result["verification"] = "error"
+        result["verification_error"] = str(e)
+
 def main():
     parser = argparse.ArgumentParser(description="Migrate Codacy repository quality settings from self-hosted to cloud.")
     parser.add_argument("-p", "--provider", required=True, help="The provider (e.g., gh for GitHub, gl for GitLab)")
     parser.add_argument("-o", "--organization", required=True, help="The remote organization name for self-hosted")
     parser.add_argument("-c", "--cloud-organization", required=True, help="The organization name in Codacy Cloud")
+    parser.add_argument("-w", "--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help=f"Number of repositories migrated concurrently, and of API requests in flight (default: {DEFAULT_MAX_WORKERS}, 1 to migrate them one at a time)")
+    parser.add_argument("--sync", action="store_true", help="Compare the self-hosted and cloud settings first and only update the ones that differ")
+    parser.add_argument("--verify", choices=VERIFY_POLICIES, default='trust-put', help="How to check the cloud settings after each update (default: trust-put)")
+    parser.add_argument("--sample-rate", type=float, default=DEFAULT_SAMPLE_RATE, help=f"Share of the migrated settings read back with --verify sampled (default: {DEFAULT_SAMPLE_RATE})")
     args = parser.parse_args()
 
+    global request_slots
+    request_slots = threading.BoundedSemaphore(max(1, args.max_workers))
+
     self_hosted_api_url = get_env_variable('SELF_HOSTED_API_URL')
     self_hosted_api_token = get_env_variable('SELF_HOSTED_API_TOKEN')
     cloud_api_token = get_env_variable('CLOUD_API_TOKEN')
 
+    # Only the status of each setting is kept in memory, full results are written to the JSONL file as repositories complete
     migration_results = {}
+    verification_candidates = []
+    results_lock = threading.Lock()
+    output_file = f"{args.organization}_migration_results.jsonl"
 
-    try:
-        repositories = get_repositories(self_hosted_api_url, self_hosted_api_token, args.provider, args.organization)
-        print(f"Retrieved {len(repositories)} repositories")
-
-        with tqdm(total=len(repositories) * 3, desc="Migrating Settings", unit="setting") as pbar:
-            for repo in repositories:
-                repo_name = repo['name']
-                migration_results[repo_name] = {}
-
-                for settings_type in ['repository', 'commits', 'pull-requests']:
-                    try:
-                        # Get settings from self-hosted
-                        self_hosted_settings = get_quality_settings(self_hosted_api_url, self_hosted_api_token, args.provider, args.organization, repo_name, settings_type)
-                        
-                        # Update settings in cloud
-                        cloud_update_result = update_cloud_quality_settings(cloud_api_token, args.provider, args.cloud_organization, repo_name, self_hosted_settings, settings_type)
-                        
-                        # Verify the update
-                        verified_settings = get_quality_settings(CLOUD_API_URL, cloud_api_token, args.provider, args.cloud_organization, repo_name, settings_type)
-                        
-                        migration_results[repo_name][settings_type] = {
-                            "status": "success",
-                            "self_hosted_settings": self_hosted_settings,
-                            "cloud_update_result": cloud_update_result,
-                            "verified_cloud_settings": verified_settings
-                        }
-                    except requests.exceptions.RequestException as e:
-                        migration_results[repo_name][settings_type] = {
-                            "status": "error",
-                            "error_message": str(e)
-                        }
-                    
-                    pbar.update(1)
+    with open(output_file, 'w') as results_file:
+        def write_result(record: Dict) -> None:
+            results_file.write(json.dumps(record) + "\n")
+            results_file.flush()
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error retrieving repositories: {str(e)}")
+        with tqdm(total=0, desc="Migrating Settings", unit="setting") as pbar:
+            def record_repository(repo_name: str, future) -> None:
+                try:
+                    repo_results = future.result()
+                except Exception as e:
+                    repo_results = {settings_type: {"status": "error", "error_message": str(e)} for settings_type in SETTINGS_TYPES}
+                with results_lock:
+                    write_result({"repository": repo_name, "settings": repo_results})
+                    migration_results[repo_name] = {settings_type: {"status": result["status"], "verification": result.get("verification")} for settings_type, result in repo_results.items()}
+                    if args.verify in ['sampled', 'full']:
+                        for settings_type, result in repo_results.items():
+                            if result["status"] == "success":
+                                verification_candidates.append((repo_name, settings_type, result["self_hosted_settings"]))
+                    pbar.update(len(SETTINGS_TYPES))
+
+            # Repositories are handed to the workers page by page, while the next pages are fetched
+            repository_count = 0
+            with ThreadPoolExecutor(max_workers=max(1, args.max_workers)) as executor:
+                try:
+                    for page in iter_repository_pages(self_hosted_api_url, self_hosted_api_token, args.provider, args.organization):
+                        repository_count += len(page)
+                        with results_lock:
+                            pbar.total += len(page) * len(SETTINGS_TYPES)
+                            pbar.refresh()
+                        for repo in page:
+                            future = executor.submit(migrate_repository, self_hosted_api_url, self_hosted_api_token, cloud_api_token, args.provider, args.organization, args.cloud_organization, repo['name'], args.verify, args.sync)
+                            future.add_done_callback(partial(record_repository, repo['name']))
+                except requests.exceptions.RequestException as e:
+                    print(f"Error retrieving repositories: {str(e)}")
+        print(f"Retrieved {repository_count} repositories")
+
+        # Settings are read back from the cloud only once every repository is migrated
+        pending_verification = select_settings_to_verify(verification_candidates, args.verify, args.sample_rate)
+        if pending_verification:
+            with tqdm(total=len(pending_verification), desc="Verifying Settings", unit="setting") as pbar:
+                with ThreadPoolExecutor(max_workers=max(1, args.max_workers)) as executor:
+                    futures = {}
+                    for repo_name, settings_type, self_hosted_settings in pending_verification:
+                        result = {"status": "success", "self_hosted_settings": self_hosted_settings}
+                        futures[executor.submit(verify_setting, cloud_api_token, args.provider, args.cloud_organization, repo_name, settings_type, result)] = (repo_name, settings_type, result)
+                    for future in as_completed(futures):
+                        future.result()
+                        repo_name, settings_type, result = futures[future]
+                        del result["self_hosted_settings"]
+                        write_result({"repository": repo_name, "settings_type": settings_type, **result})
+                        migration_results[repo_name][settings_type] = {"status": result["status"], "verification": result["verification"]}
+                        pbar.update(1)
 
-    output_file = f"{args.organization}_migration_results.json"
-    with open(output_file, 'w') as f:
-        json.dump(migration_results, f, indent=2)
-    
     print(f"\nMigration results have been written to {output_file}")
 
     # Print summary
     total_repos = len(migration_results)
-    successful_repos = sum(1 for repo in migration_results.values() if all(setting['status'] == 'success' for setting in repo.values()))
+    successful_repos = sum(1 for repo in migration_results.values() if all(setting['status'] in ['success', 'unchanged'] for setting in repo.values()))
     print(f"\nMigration Summary:")
     print(f"Total repositories processed: {total_repos}")
     print(f"Fully successful migrations: {successful_repos}")
     print(f"Repositories with issues: {total_repos - successful_repos}")
+    if args.sync:
+        unchanged_settings = sum(1 for repo in migration_results.values() for setting in repo.values() if setting['status'] == 'unchanged')
+        print(f"Settings already in sync (not updated): {unchanged_settings}")
+    verified_settings = sum(1 for repo in migration_results.values() for setting in repo.values() if setting.get('verification') == 'verified')
+    mismatched_settings = sum(1 for repo in migration_results.values() for setting in repo.values() if setting.get('verification') == 'mismatch')
+    print(f"Settings read back and verified ({args.verify}): {verified_settings}")
+    print(f"Settings that don't match after the update: {mismatched_settings}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,11 +2,16 @@ import argparse
 import os
 import requests
 import json
+import math
+import random
 from typing import List, Dict
 from urllib.parse import urljoin, quote
 from tqdm import tqdm
 
 CLOUD_API_URL = "https://app.codacy.com"
+# none: no check, trust-put: compare the PUT response, sampled: trust-put plus reading back a sample, full: read back everything
+VERIFY_POLICIES = ['none', 'trust-put', 'sampled', 'full']
+DEFAULT_SAMPLE_RATE = 0.1
 
 def get_env_variable(var_name: str) -> str:
     value = os.getenv(var_name)
@@ -39,6 +44,33 @@ def update_cloud_quality_settings(api_token: str, provider: str, organization: s
     response.raise_for_status()
     return response.json()
 
+def settings_match(expected: Dict, actual: Dict) -> bool:
+    # The PUT response wraps the stored settings in "data", the GET response is already unwrapped
+    if isinstance(actual, dict) and isinstance(actual.get('data'), dict):
+        actual = actual['data']
+    return isinstance(actual, dict) and all(actual.get(key) == value for key, value in expected.items())
+
+def select_settings_to_verify(repo_results: Dict, verify_policy: str, sample_rate: float) -> List[str]:
+    candidates = [settings_type for settings_type, result in repo_results.items() if result['status'] == 'success']
+    if verify_policy == 'full':
+        return candidates
+    if verify_policy == 'sampled' and candidates:
+        return random.sample(candidates, min(len(candidates), max(1, math.ceil(len(candidates) * sample_rate))))
+    return []
+
+def verify_setting(cloud_api_token: str, provider: str, cloud_organization: str, repo_name: str, settings_type: str, result: Dict) -> None:
+    try:
+        verified_settings = get_quality_settings(CLOUD_API_URL, cloud_api_token, provider, cloud_organization, repo_name, settings_type)
+        result["verified_cloud_settings"] = verified_settings
+        if settings_match(result["self_hosted_settings"], verified_settings):
+            result["verification"] = "verified"
+        else:
+            result["verification"] = "mismatch"
+            result["status"] = "verification_failed"
+    except requests.exceptions.RequestException as e:
+        result["verification"] = "error"
+        result["verification_error"] = str(e)
+
 def select_repository(repositories: List[Dict]) -> Dict:
     print("\nAvailable repositories:")
     for i, repo in enumerate(repositories, 1):
@@ -59,6 +91,8 @@ def main():
     parser.add_argument("-p", "--provider", required=True, help="The provider (e.g., gh for GitHub, gl for GitLab)")
     parser.add_argument("-o", "--organization", required=True, help="The remote organization name for self-hosted")
     parser.add_argument("-c", "--cloud-organization", required=True, help="The organization name in Codacy Cloud")
+    parser.add_argument("--verify", choices=VERIFY_POLICIES, default='trust-put', help="How to check the cloud settings after each update (default: trust-put)")
+    parser.add_argument("--sample-rate", type=float, default=DEFAULT_SAMPLE_RATE, help=f"Share of the migrated settings read back with --verify sampled (default: {DEFAULT_SAMPLE_RATE})")
     args = parser.parse_args()
 
     self_hosted_api_url = get_env_variable('SELF_HOSTED_API_URL')
@@ -86,15 +120,20 @@ def main():
                     # Update settings in cloud
                     cloud_update_result = update_cloud_quality_settings(cloud_api_token, args.provider, args.cloud_organization, repo_name, self_hosted_settings, settings_type)
                     
-                    # Verify the update
-                    verified_settings = get_quality_settings(CLOUD_API_URL, cloud_api_token, args.provider, args.cloud_organization, repo_name, settings_type)
-                    
                     migration_results[repo_name][settings_type] = {
                         "status": "success",
                         "self_hosted_settings": self_hosted_settings,
                         "cloud_update_result": cloud_update_result,
-                        "verified_cloud_settings": verified_settings
+                        "verification": "skipped"
                     }
+
+                    # Reading the settings back, if needed, is deferred until every setting is migrated
+                    if args.verify in ['trust-put', 'sampled']:
+                        if settings_match(self_hosted_settings, cloud_update_result):
+                            migration_results[repo_name][settings_type]["verification"] = "trusted"
+                        else:
+                            migration_results[repo_name][settings_type]["verification"] = "mismatch"
+                            migration_results[repo_name][settings_type]["status"] = "verification_failed"
                 except requests.exceptions.RequestException as e:
                     migration_results[repo_name][settings_type] = {
                         "status": "error",
@@ -103,6 +142,9 @@ def main():
                 
                 pbar.update(1)
 
+        for settings_type in select_settings_to_verify(migration_results[repo_name], args.verify, args.sample_rate):
+            verify_setting(cloud_api_token, args.provider, args.cloud_organization, repo_name, settings_type, migration_results[repo_name][settings_type])
+
     except requests.exceptions.RequestException as e:
         print(f"Error retrieving repositories: {str(e)}")
 
@@ -118,6 +160,8 @@ def main():
     print(f"Total settings processed: 3")
     print(f"Successful migrations: {successful_settings}")
     print(f"Settings with issues: {3 - successful_settings}")
+    verified_settings = sum(1 for setting in migration_results[repo_name].values() if setting.get('verification') == 'verified')
+    print(f"Settings read back and verified ({args.verify}): {verified_settings}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,13 +1,22 @@
 import os
+import sys
+import json
+import hashlib
+import threading
+import time
 import requests
+import requests.adapters
 import argparse
 import csv
-from typing import List, Dict, Any
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional
 
 class CodacyAPI:
     BASE_URL = "https://app.codacy.com/api/v3"
+    PAGE_LIMIT = 100
 
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None, pool_size: int = 10, cache_max_age: float = 24 * 60 * 60):
         self.api_token = os.environ.get("CODACY_API_TOKEN")
         self.git_provider = os.environ.get("GIT_PROVIDER")
         self.organization_name = os.environ.get("CODACY_ORGANIZATION_NAME")
@@ -21,75 +30,84 @@ class CodacyAPI:
             "Content-Type": "application/json"
         }
 
-    def get_repositories(self) -> List[Dict[str, Any]]:
-        url = f"{self.BASE_URL}/organizations/{self.git_provider}/{self.organization_name}/repositories"
-        all_repositories = []
-        cursor = None
-
-        while True:
-            params = {"limit": 100}
-            if cursor:
-                params["cursor"] = cursor
-
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
+        # One keep-alive connection pool shared by every request (and every worker thread)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.cache_dir = cache_dir
+        self.cache_max_age = cache_max_age
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, url: str, params: Dict[str, Any]) -> str:
+        key = json.dumps([url, sorted(params.items())])
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None, cache: bool = False) -> Dict[str, Any]:
+        """GET a page of the API. With cache, the response is reused from the cache directory while it is fresh."""
+        params = params or {}
+        cache_path = self._cache_path(url, params) if cache and self.cache_dir else None
+        if cache_path and os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < self.cache_max_age:
+            with open(cache_path, encoding="utf-8") as f:
+                return json.load(f)
+
+        response = self.session.get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
 
-            repositories = data.get("data", [])
-            all_repositories.extend(repositories)
+        if cache_path:
+            # Write to a temporary file first so concurrent readers never see a partial response
+            tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, cache_path)
+        return data
 
-            pagination = data.get("pagination", {})
-            cursor = pagination.get("cursor")
+    def _iter_pages(self, url: str, params: Optional[Dict[str, Any]] = None, cache: bool = False) -> Iterator[List[Dict[str, Any]]]:
+        params = dict(params or {}, limit=self.PAGE_LIMIT)
+        while True:
+            data = self._get(url, params, cache)
+            yield data.get("data", [])
 
+            cursor = data.get("pagination", {}).get("cursor")
             if not cursor:
                 break
+            params["cursor"] = cursor
+
+    def get_repositories(self) -> List[Dict[str, Any]]:
+        url = f"{self.BASE_URL}/organizations/{self.git_provider}/{self.organization_name}/repositories"
+        all_repositories = [repo for page in self._iter_pages(url) for repo in page]
 
         print(f"Total repositories fetched: {len(all_repositories)}")
         return all_repositories
 
     def get_repository(self, repo_name: str) -> Dict[str, Any]:
         url = f"{self.BASE_URL}/organizations/{self.git_provider}/{self.organization_name}/repositories/{repo_name}"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json().get("data", {})
+        return self._get(url).get("data", {})
 
     def get_pull_requests(self, repo_name: str, pr_status: str) -> List[Dict[str, Any]]:
         url = f"{self.BASE_URL}/analysis/organizations/{self.git_provider}/{self.organization_name}/repositories/{repo_name}/pull-requests"
-        all_pull_requests = []
-        cursor = None
-
-        while True:
-            params = {"limit": 100}
-            if pr_status == "open":
-                params["search"] = "last-updated"
-            elif pr_status == "closed":
-                params["search"] = "merged"
-
-            if cursor:
-                params["cursor"] = cursor
-
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            pull_requests = data.get("data", [])
-            all_pull_requests.extend(pull_requests)
+        params = {}
+        if pr_status == "open":
+            params["search"] = "last-updated"
+        elif pr_status == "closed":
+            params["search"] = "merged"
 
-            pagination = data.get("pagination", {})
-            cursor = pagination.get("cursor")
-
-            if not cursor:
-                break
+        all_pull_requests = [pr for page in self._iter_pages(url, params) for pr in page]
 
         print(f"Total pull requests fetched: {len(all_pull_requests)}")
         return all_pull_requests
 
-    def get_pull_request_issues(self, repo_name: str, pull_request_number: int) -> List[Dict[str, Any]]:
+    def iter_pull_request_issue_pages(self, repo_name: str, pull_request_number: int) -> Iterator[List[Dict[str, Any]]]:
         url = f"{self.BASE_URL}/analysis/organizations/{self.git_provider}/{self.organization_name}/repositories/{repo_name}/pull-requests/{pull_request_number}/issues"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("data", [])
+        # Only the issues are cached: repository and pull request lists change too often to be reused
+        return self._iter_pages(url, cache=True)
+
+    def get_pull_request_issues(self, repo_name: str, pull_request_number: int) -> List[Dict[str, Any]]:
+        return [issue for page in self.iter_pull_request_issue_pages(repo_name, pull_request_number) for issue in page]
 
 def select_repository(repositories: List[Dict[str, Any]]) -> str:
     print("\nAvailable Repositories:")
@@ -140,33 +158,218 @@ def map_severity_to_ui(api_severity: str) -> str:
     }
     return severity_mapping.get(api_severity, api_severity)
 
-def save_to_csv(issues: List[Dict[str, Any]], filename: str):
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['message', 'severity', 'filePath', 'line', 'category', 'tool', 'patternId']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        writer.writeheader()
-        for issue in issues:
-            commit_issue = issue.get('commitIssue', {})
-            pattern_info = commit_issue.get('patternInfo', {})
-            writer.writerow({
-                'message': commit_issue.get('message', ''),
-                'severity': map_severity_to_ui(pattern_info.get('severityLevel', '')),
-                'filePath': commit_issue.get('filePath', ''),
-                'line': commit_issue.get('lineNumber', ''),
-                'category': pattern_info.get('category', ''),
-                'tool': commit_issue.get('toolInfo', {}).get('name', ''),
-                'patternId': pattern_info.get('id', '')
-            })
+CSV_FIELDNAMES = ['message', 'severity', 'filePath', 'line', 'category', 'tool', 'patternId']
+
+def issue_matches(issue: Dict[str, Any], severity: Optional[str] = None, category: Optional[str] = None, tool: Optional[str] = None) -> bool:
+    commit_issue = issue.get('commitIssue', {})
+    pattern_info = commit_issue.get('patternInfo', {})
+    if severity and map_severity_to_ui(pattern_info.get('severityLevel', '')).lower() != severity.lower():
+        return False
+    if category and pattern_info.get('category', '').lower() != category.lower():
+        return False
+    if tool and commit_issue.get('toolInfo', {}).get('name', '').lower() != tool.lower():
+        return False
+    return True
+
+def iter_pull_request_issues(codacy: CodacyAPI, repo_name: str, pr_number: int, severity: Optional[str] = None,
+                             category: Optional[str] = None, tool: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the issues of a pull request matching the filters, one API page at a time."""
+    for page in codacy.iter_pull_request_issue_pages(repo_name, pr_number):
+        for issue in page:
+            if issue_matches(issue, severity, category, tool):
+                yield issue
+
+def issue_to_csv_row(issue: Dict[str, Any]) -> Dict[str, Any]:
+    commit_issue = issue.get('commitIssue', {})
+    pattern_info = commit_issue.get('patternInfo', {})
+    return {
+        'message': commit_issue.get('message', ''),
+        'severity': map_severity_to_ui(pattern_info.get('severityLevel', '')),
+        'filePath': commit_issue.get('filePath', ''),
+        'line': commit_issue.get('lineNumber', ''),
+        'category': pattern_info.get('category', ''),
+        'tool': commit_issue.get('toolInfo', {}).get('name', ''),
+        'patternId': pattern_info.get('id', '')
+    }
+
+def print_issue(issue: Dict[str, Any]):
+    commit_issue = issue.get('commitIssue', {})
+    pattern_info = commit_issue.get('patternInfo', {})
+    tool_info = commit_issue.get('toolInfo', {})
+
+    print(f"- {commit_issue.get('message', 'No message provided')}")
+    print(f"  Severity: {map_severity_to_ui(pattern_info.get('severityLevel', 'Unknown'))}")
+    print(f"  File: {commit_issue.get('filePath', 'Unknown')}")
+    print(f"  Line: {commit_issue.get('lineNumber', 'Unknown')}")
+    print(f"  Category: {pattern_info.get('category', 'Unknown')}")
+    print(f"  Tool: {tool_info.get('name', 'Unknown')}")
+    print(f"  Pattern ID: {pattern_info.get('id', 'Unknown')}")
+    print()  # Add a blank line between issues for better readability
+
+class CsvIssueWriter:
+    """Thread-safe CSV writer for issues. The file is only created once the first issue is written."""
+
+    def __init__(self, filename: str, extra_fieldnames: Optional[List[str]] = None):
+        self.filename = filename
+        self.fieldnames = (extra_fieldnames or []) + CSV_FIELDNAMES
+        self.lock = threading.Lock()
+        self.csvfile = None
+        self.writer = None
+
+    def write(self, issue: Dict[str, Any], **extra):
+        row = dict(issue_to_csv_row(issue), **extra)
+        with self.lock:
+            if self.writer is None:
+                self.csvfile = open(self.filename, 'w', newline='', encoding='utf-8')
+                self.writer = csv.DictWriter(self.csvfile, fieldnames=self.fieldnames, extrasaction='ignore')
+                self.writer.writeheader()
+            self.writer.writerow(row)
+
+    def close(self):
+        if self.csvfile:
+            self.csvfile.close()
+
+def export_issues(issues: Iterator[Dict[str, Any]], writer: CsvIssueWriter, print_issues: bool = False, **extra) -> Counter:
+    """Stream issues into the CSV writer and return the number of issues per severity."""
+    severity_counts = Counter()
+    for issue in issues:
+        writer.write(issue, **extra)
+        severity_counts[map_severity_to_ui(issue.get('commitIssue', {}).get('patternInfo', {}).get('severityLevel', 'Unknown'))] += 1
+        if print_issues:
+            print_issue(issue)
+    return severity_counts
+
+def format_severity_counts(severity_counts: Counter) -> str:
+    return ", ".join(f"{severity}: {count}" for severity, count in severity_counts.most_common())
+
+def export_pull_request(codacy: CodacyAPI, repo_name: str, pr_number: int, args, combined_writer: Optional[CsvIssueWriter]) -> Counter:
+    writer = combined_writer or CsvIssueWriter(os.path.join(args.output_dir, f"{repo_name}_pr_{pr_number}_issues.csv"))
+    try:
+        issues = iter_pull_request_issues(codacy, repo_name, pr_number, args.severity, args.category, args.tool)
+        return export_issues(issues, writer, args.print_issues, repository=repo_name, pullRequest=pr_number)
+    finally:
+        if writer is not combined_writer:
+            writer.close()
+
+def run_headless(codacy: CodacyAPI, args):
+    """Export the issues of every pull request matching the filters, without prompting."""
+    if args.all_repositories:
+        repo_names = [repo['name'] for repo in codacy.get_repositories()]
+    else:
+        repo_names = args.repositories
+
+    pr_statuses = ["open", "closed"] if args.pr_status == "all" else [args.pr_status]
+    pr_numbers = set(args.pr_numbers or [])
+
+    targets = []
+    for repo_name in repo_names:
+        for pr_status in pr_statuses:
+            for pr in codacy.get_pull_requests(repo_name, pr_status):
+                pr_number = pr['pullRequest']['number']
+                if not pr_numbers or pr_number in pr_numbers:
+                    targets.append((repo_name, pr_number))
+    # A PR can be listed under both statuses
+    targets = list(dict.fromkeys(targets))
+    print(f"Exporting issues for {len(targets)} pull requests across {len(repo_names)} repositories")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    combined_writer = None
+    if args.combined:
+        combined_writer = CsvIssueWriter(os.path.join(args.output_dir, f"{codacy.organization_name}_pr_issues.csv"),
+                                         extra_fieldnames=['repository', 'pullRequest'])
+
+    total_counts = Counter()
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+            futures = {
+                executor.submit(export_pull_request, codacy, repo_name, pr_number, args, combined_writer): (repo_name, pr_number)
+                for repo_name, pr_number in targets
+            }
+            for future in as_completed(futures):
+                repo_name, pr_number = futures[future]
+                try:
+                    severity_counts = future.result()
+                except requests.exceptions.RequestException as e:
+                    print(f"Error fetching issues for {repo_name} PR #{pr_number}: {e}")
+                    failed.append((repo_name, pr_number))
+                    continue
+
+                total_counts += severity_counts
+                print(f"{repo_name} PR #{pr_number}: {sum(severity_counts.values())} issues")
+    finally:
+        if combined_writer:
+            combined_writer.close()
+
+    if combined_writer and combined_writer.csvfile:
+        print(f"\nIssue information has been saved to {combined_writer.filename}")
+    print(f"Exported {sum(total_counts.values())} issues from {len(targets) - len(failed)} pull requests")
+    if total_counts:
+        print(f"Issues per severity: {format_severity_counts(total_counts)}")
+    if failed:
+        print(f"Failed to export {len(failed)} pull requests: {', '.join(f'{repo}#{number}' for repo, number in failed)}")
+
+def config_to_args(parser: argparse.ArgumentParser, config: Dict[str, Any]) -> List[str]:
+    """Turn a --config JSON object into command-line arguments, so its values get the flags' types and choices."""
+    if not isinstance(config, dict):
+        parser.error("--config must contain a JSON object")
+    actions = {action.dest: action for action in parser._actions if action.option_strings}
+    config_args = []
+    for key, value in config.items():
+        action = actions.get(key)
+        if not action or key in ("help", "config"):
+            parser.error(f"unknown option in --config: {key}")
+        flag = action.option_strings[-1]
+        if isinstance(action, argparse._StoreTrueAction):
+            if not isinstance(value, bool):
+                parser.error(f"{key} in --config must be true or false")
+            if value:
+                config_args.append(flag)
+        elif action.nargs == "+":
+            values = value if isinstance(value, list) else [value]
+            if not values:
+                parser.error(f"{key} in --config must not be empty")
+            config_args.append(flag)
+            config_args.extend(str(item) for item in values)
+        elif value is not None:
+            config_args.extend([flag, str(value)])
+    return config_args
 
 def main():
     parser = argparse.ArgumentParser(description="Filter Codacy issues by severity in pull requests.")
     parser.add_argument("--severity", choices=["minor", "medium", "critical"], help="Filter by severity")
-
-    args = parser.parse_args()
+    parser.add_argument("--category", help="Filter by pattern category (e.g. Security, ErrorProne)")
+    parser.add_argument("--tool", help="Filter by tool name (e.g. ESLint)")
+    parser.add_argument("--print-issues", dest="print_issues", action="store_true", help="Print every issue instead of a per-severity summary")
+    parser.add_argument("--config", help="JSON file with the headless mode options (keys named like the flags, e.g. \"pr_status\"); flags override it")
+    parser.add_argument("--repositories", nargs="+", help="Headless mode: repositories to export, no prompts are shown")
+    parser.add_argument("--all-repositories", dest="all_repositories", action="store_true", help="Headless mode: export every repository of the organization")
+    parser.add_argument("--pr-status", dest="pr_status", choices=["open", "closed", "all"], default="open", help="Headless mode: pull requests to export (default: open)")
+    parser.add_argument("--pr-numbers", dest="pr_numbers", nargs="+", type=int, help="Headless mode: only export these pull request numbers")
+    parser.add_argument("--output-dir", dest="output_dir", default=".", help="Headless mode: directory for the CSV files (default: current directory)")
+    parser.add_argument("--combined", action="store_true", help="Headless mode: write all issues to a single CSV file instead of one per pull request")
+    parser.add_argument("--max-workers", dest="max_workers", type=int, default=8, help="Headless mode: pull requests fetched concurrently (default: 8)")
+    parser.add_argument("--cache-dir", dest="cache_dir", help="Directory where pull request issues are cached and reused on later runs")
+    parser.add_argument("--cache-max-age", dest="cache_max_age", type=float, default=24 * 60 * 60, help="Seconds a cached response is reused for; 0 always refetches (default: 86400)")
+
+    args, _ = parser.parse_known_args()
+    config_args = []
+    if args.config:
+        with open(args.config) as f:
+            config_args = config_to_args(parser, json.load(f))
+    # The config goes first so the flags override it, and both are checked the same way
+    args = parser.parse_args(config_args + sys.argv[1:])
+
+    if args.repositories or args.all_repositories:
+        try:
+            codacy = CodacyAPI(cache_dir=args.cache_dir, pool_size=args.max_workers, cache_max_age=args.cache_max_age)
+            run_headless(codacy, args)
+        except (ValueError, requests.exceptions.RequestException) as e:
+            print(f"Error: {e}")
+        return
 
     try:
-        codacy = CodacyAPI()
+        codacy = CodacyAPI(cache_dir=args.cache_dir, cache_max_age=args.cache_max_age)
         repositories = codacy.get_repositories()
         selected_repo = select_repository(repositories)
         repo_info = codacy.get_repository(selected_repo)
@@ -192,40 +395,19 @@ def main():
         print(f"New Issues: {selected_pr.get('newIssues', 'Unknown')}")
         print(f"Fixed Issues: {selected_pr.get('fixedIssues', 'Unknown')}")
 
-        issues = codacy.get_pull_request_issues(selected_repo, pr_number)
-        
-        if args.severity:
-            issues = [issue for issue in issues if map_severity_to_ui(issue['commitIssue']['patternInfo']['severityLevel']).lower() == args.severity.lower()]
-
-        print(f"\nFound {len(issues)} issues in Pull Request #{pr_number}:")
-
-        # Display summary of all issues
-        for issue in issues:
-            commit_issue = issue.get('commitIssue', {})
-            pattern_info = commit_issue.get('patternInfo', {})
-            tool_info = commit_issue.get('toolInfo', {})
-
-            message = commit_issue.get('message', 'No message provided')
-            severity = map_severity_to_ui(pattern_info.get('severityLevel', 'Unknown'))
-            file_path = commit_issue.get('filePath', 'Unknown')
-            line = commit_issue.get('lineNumber', 'Unknown')
-            category = pattern_info.get('category', 'Unknown')
-            tool = tool_info.get('name', 'Unknown')
-            pattern_id = pattern_info.get('id', 'Unknown')
-
-            print(f"- {message}")
-            print(f"  Severity: {severity}")
-            print(f"  File: {file_path}")
-            print(f"  Line: {line}")
-            print(f"  Category: {category}")
-            print(f"  Tool: {tool}")
-            print(f"  Pattern ID: {pattern_id}")
-            print()  # Add a blank line between issues for better readability
-
-        if issues:
-            csv_filename = f"{selected_repo}_pr_{pr_number}_issues.csv"
-            save_to_csv(issues, csv_filename)
-            print(f"\nDetailed issue information has been saved to {csv_filename}")
+        writer = CsvIssueWriter(f"{selected_repo}_pr_{pr_number}_issues.csv")
+        try:
+            if args.print_issues:
+                print(f"\nIssues in Pull Request #{pr_number}:")
+            issues = iter_pull_request_issues(codacy, selected_repo, pr_number, args.severity, args.category, args.tool)
+            severity_counts = export_issues(issues, writer, args.print_issues)
+        finally:
+            writer.close()
+
+        print(f"\nFound {sum(severity_counts.values())} issues in Pull Request #{pr_number}")
+        if severity_counts:
+            print(f"Issues per severity: {format_severity_counts(severity_counts)}")
+            print(f"\nDetailed issue information has been saved to {writer.filename}")
         else:
             print("No issues found.")
 